@@ -0,0 +1,78 @@
+import pygame
+
+_layers = {}
+_STRIP_KEY = (255, 0, 255)
+
+
+def cached_layer(key, size, builder, alpha=False):
+    # Static scenery is drawn once per key (resolution, theme, layout) and reused.
+    layer = _layers.get(key)
+    if layer is not None:
+        return layer
+
+    surface = pygame.Surface(size, pygame.SRCALPHA if alpha else 0)
+    builder(surface)
+    pos = (0, 0)
+    if alpha:
+        bounds = surface.get_bounding_rect()
+        surface = surface.subsurface(bounds).copy()
+        pos = bounds.topleft
+
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert_alpha() if alpha else surface.convert()
+
+    layer = (surface, pos)
+    _layers[key] = layer
+    return layer
+
+
+def clear_layers():
+    _layers.clear()
+
+
+def _strip_layer(key, size, builder):
+    strip = _layers.get(key)
+    if strip is not None:
+        return strip
+
+    width, height = size
+    art = pygame.Surface(size, pygame.SRCALPHA)
+    # Draw every shape one period to each side as well so it wraps seamlessly.
+    for shift in (-width, 0, width):
+        builder(art, shift)
+    bounds = art.get_bounding_rect()
+
+    # Keep the full period horizontally but only the painted rows, and use a
+    # colorkey instead of per-pixel alpha since the shapes are not antialiased.
+    surface = pygame.Surface((width, max(1, bounds.height)))
+    surface.fill(_STRIP_KEY)
+    surface.blit(art, (0, -bounds.top))
+    surface.set_colorkey(_STRIP_KEY, pygame.RLEACCEL)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+
+    strip = (surface, bounds.top)
+    _layers[key] = strip
+    return strip
+
+
+class ParallaxLayer:
+    def __init__(self, name, factor, builder, theme=()):
+        self.name = name
+        self.factor = factor
+        self.builder = builder
+        self.theme = theme
+        self.offset = 0.0
+
+    def scroll(self, dx):
+        # Float accumulator; wrapping happens at draw time once the period is known.
+        self.offset += dx * self.factor
+
+    def draw(self, screen, offset_x=0):
+        width, height = screen.get_size()
+        key = ("parallax", self.name, (width, height), self.theme)
+        surface, top = _strip_layer(key, (width, height), self.builder)
+        x = int(round(self.offset + offset_x * self.factor)) % width - width
+        while x < width:
+            screen.blit(surface, (x, top))
+            x += width
@@ -0,0 +1,120 @@
+import numpy as np
+
+from settings import *
+
+
+def platform_array(platforms):
+    # (P, 4) int64 array of (x, y, w, h). Per-player layouts may be stacked into
+    # (N, P, 4), padding with zero-size rects, which never collide.
+    if not len(platforms):
+        return np.zeros((0, 4), dtype=np.int64)
+    return np.array([tuple(p) for p in platforms], dtype=np.int64)
+
+
+class PlayerBatch:
+    # Struct-of-arrays version of Player.update for many players at once. Every
+    # step reproduces the scalar code exactly: velocities stay float64 like Python
+    # floats, np.rint rounds half to even like round(), and platforms are resolved
+    # one after another in list order, vectorized across players.
+    def __init__(self, count):
+        self.count = count
+        self.x = np.zeros(count, dtype=np.int64)
+        self.y = np.zeros(count, dtype=np.int64)
+        self.w = np.full(count, PLAYER_WIDTH, dtype=np.int64)
+        self.h = np.full(count, PLAYER_HEIGHT, dtype=np.int64)
+        self.vel_x = np.zeros(count, dtype=np.float64)
+        self.vel_y = np.zeros(count, dtype=np.float64)
+        self.on_ground = np.zeros(count, dtype=np.bool_)
+        self.crouching = np.zeros(count, dtype=np.bool_)
+        self.attack_timer = np.zeros(count, dtype=np.int64)
+        self.facing = np.ones(count, dtype=np.int64)
+
+    @classmethod
+    def from_players(cls, players):
+        batch = cls(len(players))
+        for i, player in enumerate(players):
+            batch.load(i, player)
+        return batch
+
+    def load(self, i, player):
+        self.x[i], self.y[i], self.w[i], self.h[i] = player.rect
+        self.vel_x[i] = player.vel_x
+        self.vel_y[i] = player.vel_y
+        self.on_ground[i] = player.on_ground
+        self.crouching[i] = player.crouching
+        self.attack_timer[i] = player.attack_timer
+        self.facing[i] = player.facing
+
+    def store(self, i, player):
+        player.rect.update(int(self.x[i]), int(self.y[i]), int(self.w[i]), int(self.h[i]))
+        player.vel_x = float(self.vel_x[i])
+        player.vel_y = float(self.vel_y[i])
+        player.on_ground = bool(self.on_ground[i])
+        player.crouching = bool(self.crouching[i])
+        player.attack_timer = int(self.attack_timer[i])
+        player.facing = int(self.facing[i])
+
+    def set_crouch(self, should_crouch):
+        should_crouch = np.asarray(should_crouch, dtype=np.bool_)
+        target = np.where(should_crouch & self.on_ground, PLAYER_CROUCH_HEIGHT, PLAYER_HEIGHT)
+        # Keep the feet planted while the height changes.
+        self.y += self.h - target
+        self.h[:] = target
+        self.crouching = should_crouch & self.on_ground
+
+    def jump(self, want_jump):
+        jumped = np.asarray(want_jump, dtype=np.bool_) & self.on_ground
+        self.vel_y[jumped] = JUMP_STRENGTH
+        self.on_ground[jumped] = False
+        return jumped
+
+    def attack(self, want_attack):
+        self.attack_timer[np.asarray(want_attack, dtype=np.bool_)] = ATTACK_FRAMES
+
+    def _hits(self, px, py, pw, ph):
+        # pygame.Rect.colliderect, including its rule that empty rects never collide.
+        return (
+            (self.x < px + pw) & (self.x + self.w > px)
+            & (self.y < py + ph) & (self.y + self.h > py)
+            & (pw > 0) & (ph > 0)
+        )
+
+    def update(self, move_dir, platforms):
+        # move_dir: (N,) of -1/0/1. platforms: (P, 4) shared by every player or
+        # (N, P, 4) per player, as built by platform_array.
+        move_dir = np.asarray(move_dir, dtype=np.int64)
+        platforms = np.asarray(platforms, dtype=np.int64)
+        self.vel_x = move_dir * PLAYER_SPEED
+        self.facing = np.where(move_dir != 0, np.sign(move_dir), self.facing)
+
+        # Horizontal motion and collision
+        self.x += np.rint(self.vel_x).astype(np.int64)
+        np.clip(self.x, 0, WIDTH - self.w, out=self.x)
+        moving_right = self.vel_x > 0
+        moving_left = self.vel_x < 0
+        for px, py, pw, ph in self._platform_columns(platforms):
+            hit = self._hits(px, py, pw, ph)
+            self.x = np.where(hit & moving_right, px - self.w, self.x)
+            self.x = np.where(hit & moving_left, px + pw, self.x)
+
+        # Vertical motion and collision
+        self.vel_y = np.minimum(self.vel_y + GRAVITY, MAX_FALL_SPEED)
+        self.y += np.rint(self.vel_y).astype(np.int64)
+        self.on_ground[:] = False
+        for px, py, pw, ph in self._platform_columns(platforms):
+            hit = self._hits(px, py, pw, ph)
+            landing = hit & (self.vel_y > 0)
+            bumping = hit & (self.vel_y < 0)
+            self.y = np.where(landing, py - self.h, self.y)
+            self.y = np.where(bumping, py + ph, self.y)
+            self.vel_y = np.where(landing | bumping, 0.0, self.vel_y)
+            self.on_ground |= landing
+
+        self.attack_timer = np.maximum(self.attack_timer - 1, 0)
+
+    @staticmethod
+    def _platform_columns(platforms):
+        if platforms.ndim == 2:
+            return platforms
+        # Per-player layouts: yield one (N,) column per platform slot.
+        return (tuple(platforms[:, j, k] for k in range(4)) for j in range(platforms.shape[1]))
@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from settings import *
+
+BENCHMARKS = []
+
+
+def benchmark(name, number=200, repeat=5):
+    def register(setup):
+        BENCHMARKS.append((name, setup, number, repeat))
+        return setup
+    return register
+
+
+def _measure(fn, number, repeat, teardown=None):
+    # teardown(result) runs after every call, outside the timed region.
+    if teardown is None:
+        fn()
+    else:
+        teardown(fn())
+    per_call = []
+    for _ in range(repeat):
+        if teardown is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            per_call.append((time.perf_counter() - start) / number)
+            continue
+        elapsed = 0.0
+        for _ in range(number):
+            start = time.perf_counter()
+            result = fn()
+            elapsed += time.perf_counter() - start
+            teardown(result)
+        per_call.append(elapsed / number)
+    us = [t * 1e6 for t in per_call]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_us": min(us),
+        "median_us": statistics.median(us),
+        "mean_us": statistics.fmean(us),
+        "stdev_us": statistics.stdev(us) if len(us) > 1 else 0.0,
+    }
+
+
+def _screen():
+    return pygame.display.get_surface()
+
+
+def _fonts():
+    return (
+        pygame.font.SysFont("bahnschrift", 18, bold=True),
+        pygame.font.SysFont("bahnschrift", 22, bold=True),
+        pygame.font.SysFont("consolas", 30, bold=True),
+        pygame.font.SysFont("consolas", 20, bold=True),
+    )
+
+
+# Canned hands in mirrored, normalized coordinates: the poses the classifier
+# distinguishes, so every branch gets exercised.
+def _hand(index_tip, wrist_y=0.6, fingers_open=4):
+    points = [(0.5, 0.5)] * 21
+    points[0] = (0.5, wrist_y)
+    for n, (tip, pip) in enumerate(((8, 6), (12, 10), (16, 14), (20, 18))):
+        points[pip] = (0.5, 0.5)
+        points[tip] = (0.5, 0.3 if n < fingers_open else 0.6)
+    points[8] = index_tip if fingers_open else (index_tip[0], 0.6)
+    return points
+
+
+CANNED_HANDS = (
+    _hand((0.5, 0.4)),
+    _hand((0.2, 0.4)),
+    _hand((0.8, 0.4)),
+    _hand((0.5, 0.2)),
+    _hand((0.5, 0.4), wrist_y=0.8),
+    _hand((0.5, 0.4), fingers_open=0),
+)
+
+
+@benchmark("level.draw_background")
+def bench_draw_background():
+    from level import Level
+    level = Level(seed=1)
+    screen = _screen()
+    level.draw_background(screen)
+    return lambda: level.draw_background(screen, 3)
+
+
+@benchmark("level.draw")
+def bench_level_draw():
+    from level import Level
+    level = Level(seed=1)
+    screen = _screen()
+    return lambda: level.draw(screen, 3)
+
+
+@benchmark("level.draw_collectibles")
+def bench_draw_collectibles():
+    from level import Level
+    level = Level(seed=1)
+    screen = _screen()
+    return lambda: level.draw_collectibles(screen, 3)
+
+
+@benchmark("player.draw", number=1000)
+def bench_player_draw():
+    from player import Player
+    player = Player()
+    screen = _screen()
+    return lambda: player.draw(screen)
+
+
+@benchmark("hud.draw_top_hud")
+def bench_top_hud():
+    from main import draw_top_hud
+    tiny_font, label_font, value_font, _ = _fonts()
+    screen = _screen()
+    return lambda: draw_top_hud(screen, tiny_font, label_font, value_font, 75, 125, 480)
+
+
+@benchmark("hud.draw_camera_panel")
+def bench_camera_panel():
+    from main import draw_camera_panel
+    tiny_font = _fonts()[0]
+    screen = _screen()
+    surface = pygame.Surface(CAMERA_SIZE)
+    return lambda: draw_camera_panel(screen, tiny_font, surface, 28.5)
+
+
+@benchmark("hud.draw_bottom_hud")
+def bench_bottom_hud():
+    from main import draw_bottom_hud
+    tiny_font, _, _, panel_font = _fonts()
+    screen = _screen()
+    return lambda: draw_bottom_hud(screen, tiny_font, panel_font, 480, 1234.5, 3, 42)
+
+
+def _player_update(count):
+    from player import Player
+    # A ground strip plus count platforms spread across and above the screen.
+    rng = np.random.default_rng(count)
+    platforms = [pygame.Rect(0, HEIGHT - 142, WIDTH, 142)]
+    for x, y in zip(rng.integers(0, WIDTH, count), rng.integers(40, HEIGHT - 160, count)):
+        platforms.append(pygame.Rect(int(x), int(y), 120, 18))
+    player = Player()
+    state = {"tick": 0}
+
+    def run():
+        state["tick"] += 1
+        if state["tick"] % 40 == 0:
+            player.jump()
+        player.update(1 if state["tick"] % 160 < 80 else -1, platforms)
+    return run
+
+
+for _count in (10, 100, 1000):
+    benchmark(f"player.update[{_count}]", number=500)(lambda count=_count: _player_update(count))
+
+
+@benchmark("batch_physics.update[256]", number=500)
+def bench_batch_update():
+    from batch_physics import PlayerBatch, platform_array
+    from level import Level
+    level = Level(seed=1)
+    batch = PlayerBatch(256)
+    batch.x[:] = np.linspace(0, WIDTH - PLAYER_WIDTH, 256).astype(np.int64)
+    batch.y[:] = level.floor_y - PLAYER_HEIGHT
+    platforms = platform_array(level.platforms)
+    move_dir = np.where(np.arange(256) % 2, 1, -1)
+    return lambda: batch.update(move_dir, platforms)
+
+
+@benchmark("level.scroll_world", number=500)
+def bench_scroll_world():
+    from level import Level
+    level = Level(seed=1)
+    return lambda: level.scroll_world(-int(PLAYER_SPEED))
+
+
+@benchmark("gesture._classify_controls", number=5000)
+def bench_classify_controls():
+    from gesture_controller import GestureController
+    # The classifier only reads its arguments, so skip the capture threads.
+    controller = GestureController.__new__(GestureController)
+    state = {"i": 0}
+
+    def run():
+        state["i"] += 1
+        controller._classify_controls(CANNED_HANDS[state["i"] % len(CANNED_HANDS)])
+    return run
+
+
+@benchmark("sound.SoundManager[background]", number=20)
+def bench_sound_background():
+    from sound_manager import SoundManager
+    # Let each worker finish building before the next construction is timed.
+    return (lambda: SoundManager(preload="background")), (lambda sound: sound.wait_ready())
+
+
+@benchmark("sound.SoundManager[eager]", number=10)
+def bench_sound_eager():
+    from sound_manager import SoundManager
+    return lambda: SoundManager(preload="eager")
+
+
+def _commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def run(selected=None, scale=1.0):
+    pygame.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))
+    results = {}
+    for name, setup, number, repeat in BENCHMARKS:
+        if selected and not any(part in name for part in selected):
+            continue
+        fn = setup()
+        teardown = None
+        if isinstance(fn, tuple):
+            fn, teardown = fn
+        results[name] = _measure(fn, max(1, int(number * scale)), repeat, teardown)
+    pygame.quit()
+    return {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    # Returns (name, baseline_us, current_us) for medians slower than the tolerance allows.
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before and result["median_us"] > before["median_us"] * (1.0 + tolerance):
+            regressions.append((name, before["median_us"], result["median_us"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rendering, physics and gesture hot paths.")
+    parser.add_argument("names", nargs="*", help="only run benchmarks whose name contains one of these")
+    parser.add_argument("-o", "--output", metavar="PATH", help="write the JSON report to PATH instead of stdout")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every iteration count")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed median slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    report = run(args.names, args.scale)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.1f} us -> {after:.1f} us", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
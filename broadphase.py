@@ -0,0 +1,74 @@
+from settings import BROADPHASE_CELL_SIZE
+
+
+class SpatialIndex:
+    def __init__(self, cell_size=BROADPHASE_CELL_SIZE):
+        self.cell_size = cell_size
+        # Items are bucketed in world space: screen_x = world_x + offset. Scrolling the
+        # whole world only moves the offset, so nothing needs re-bucketing.
+        self.offset = 0
+        self._cells = {}
+        self._spans = {}
+        self._items = {}
+        self._fixed = {}
+
+    def _columns(self, left, right):
+        first = int((left - self.offset) // self.cell_size)
+        last = int((right - 1 - self.offset) // self.cell_size)
+        return first, max(first, last)
+
+    def insert(self, key, rect, item=None, fixed=False):
+        self.remove(key)
+        item = rect if item is None else item
+        if fixed:
+            # Screen-anchored items (the ground) do not scroll with the world.
+            self._fixed[key] = (rect, item)
+            return
+
+        self._items[key] = (rect, item)
+        first, last = self._columns(rect.left, rect.right)
+        self._spans[key] = (first, last)
+        for col in range(first, last + 1):
+            self._cells.setdefault(col, set()).add(key)
+
+    def remove(self, key):
+        self._fixed.pop(key, None)
+        if self._items.pop(key, None) is None:
+            return
+        first, last = self._spans.pop(key)
+        for col in range(first, last + 1):
+            cell = self._cells.get(col)
+            if cell is not None:
+                cell.discard(key)
+                if not cell:
+                    del self._cells[col]
+
+    def clear(self):
+        self._cells.clear()
+        self._spans.clear()
+        self._items.clear()
+        self._fixed.clear()
+
+    def scroll(self, dx):
+        self.offset += dx
+
+    def query(self, rect, kind=None):
+        keys = set(self._fixed)
+        first, last = self._columns(rect.left, rect.right)
+        for col in range(first, last + 1):
+            cell = self._cells.get(col)
+            if cell:
+                keys.update(cell)
+
+        hits = []
+        for key in keys:
+            if kind is not None and key[0] != kind:
+                continue
+            entry = self._items.get(key) or self._fixed[key]
+            if rect.colliderect(entry[0]):
+                hits.append((key, entry[1]))
+
+        # Keys are (kind, index) tuples, so sorting returns hits in insertion order,
+        # which keeps collision resolution identical to a full linear scan.
+        hits.sort(key=lambda hit: hit[0])
+        return [item for _, item in hits]
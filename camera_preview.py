@@ -0,0 +1,48 @@
+import time
+
+import pygame
+
+from settings import CAMERA_PREVIEW_HZ, CAMERA_SIZE, HUD_BLUE, HUD_WHITE
+
+# MediaPipe's 21-point hand topology, kept here so drawing needs no mediapipe import.
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+
+
+class CameraPreview:
+    def __init__(self, size=CAMERA_SIZE, hz=CAMERA_PREVIEW_HZ):
+        self.size = size
+        self.interval = 1.0 / hz if hz > 0 else 0.0
+        self.surface = pygame.Surface(size)
+        self.last_update = float("-inf")
+        self.has_frame = False
+
+    def update(self, frame, landmarks=None, now=None):
+        if frame is None:
+            self.has_frame = False
+            return None
+
+        now = time.perf_counter() if now is None else now
+        if self.has_frame and now - self.last_update < self.interval:
+            return self.surface
+
+        # frame is an (h, w, 3) RGB array; surfarray expects (w, h, 3).
+        pygame.surfarray.blit_array(self.surface, frame.swapaxes(0, 1))
+        if landmarks is not None:
+            self._draw_skeleton(landmarks)
+        self.last_update = now
+        self.has_frame = True
+        return self.surface
+
+    def _draw_skeleton(self, landmarks):
+        width, height = self.size
+        points = [(int(x * width), int(y * height)) for x, y in landmarks]
+        for start, end in HAND_CONNECTIONS:
+            pygame.draw.line(self.surface, HUD_WHITE, points[start], points[end], 1)
+        for point in points:
+            pygame.draw.circle(self.surface, HUD_BLUE, point, 2)
@@ -0,0 +1,130 @@
+import numpy as np
+import pygame
+
+KINDS = ("core", "coin")
+KIND_CORE = 0
+
+
+class CollectibleView:
+    # Read-only dict-style view of one stored collectible, for code that still
+    # expects the old {"rect", "taken", "kind", "value"} items.
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, key):
+        store = self.store
+        i = self.index
+        if key == "rect":
+            return store.rect(i)
+        if key == "taken":
+            return bool(store.taken[i])
+        if key == "kind":
+            return KINDS[store.kind[i]]
+        if key == "value":
+            return int(store.value[i])
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class CollectibleStore:
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.remaining = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = getattr(self, "x", None)
+        columns = {
+            "x": np.int32,
+            "y": np.int32,
+            "w": np.int32,
+            "h": np.int32,
+            "taken": np.bool_,
+            "kind": np.int8,
+            "value": np.int32,
+        }
+        for name, dtype in columns.items():
+            column = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                column[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, column)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield CollectibleView(self, i)
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return CollectibleView(self, index)
+
+    def clear(self):
+        self.count = 0
+        self.remaining = 0
+
+    def add(self, rect, kind, value):
+        if self.count == len(self.x):
+            self._allocate(len(self.x) * 2)
+        i = self.count
+        self.x[i], self.y[i], self.w[i], self.h[i] = rect
+        self.taken[i] = False
+        self.kind[i] = KINDS.index(kind)
+        self.value[i] = value
+        self.count += 1
+        self.remaining += 1
+        return i
+
+    def place(self, i, rect, kind, value):
+        # Reuses a row that was retired with take().
+        self.x[i], self.y[i], self.w[i], self.h[i] = rect
+        self.kind[i] = KINDS.index(kind)
+        self.value[i] = value
+        self.restore(i)
+
+    def rect(self, i):
+        return pygame.Rect(int(self.x[i]), int(self.y[i]), int(self.w[i]), int(self.h[i]))
+
+    def center(self, i):
+        return (int(self.x[i] + self.w[i] // 2), int(self.y[i] + self.h[i] // 2))
+
+    def take(self, i):
+        if not self.taken[i]:
+            self.taken[i] = True
+            self.remaining -= 1
+
+    def restore(self, i):
+        if self.taken[i]:
+            self.taken[i] = False
+            self.remaining += 1
+
+    def scroll(self, dx):
+        self.x[:self.count] += dx
+
+    def active(self):
+        return np.flatnonzero(~self.taken[:self.count])
+
+    def overlapping(self, rect, inflate=0):
+        # Indices of untaken items whose rect, grown by `inflate` like Rect.inflate,
+        # collides with `rect`.
+        n = self.count
+        left = self.x[:n] - inflate // 2
+        top = self.y[:n] - inflate // 2
+        right = left + self.w[:n] + inflate
+        bottom = top + self.h[:n] + inflate
+        hit = (
+            ~self.taken[:n]
+            & (rect.left < right)
+            & (rect.right > left)
+            & (rect.top < bottom)
+            & (rect.bottom > top)
+        )
+        return np.flatnonzero(hit)
@@ -0,0 +1,213 @@
+import multiprocessing
+import os
+import random
+
+import numpy as np
+
+from game_session import GameSession
+from replay import decode_inputs, encode_inputs
+from settings import *
+
+# Discrete actions: every direction combined with every jump/crouch/attack flag,
+# stored as replay input codes so recorded runs and agents share one vocabulary.
+ACTIONS = tuple(
+    encode_inputs({"direction": direction, "jump": jump, "crouch": crouch, "attack": attack})
+    for direction in (0, 1, -1)
+    for jump in (False, True)
+    for crouch in (False, True)
+    for attack in (False, True)
+)
+NUM_ACTIONS = len(ACTIONS)
+_ACTION_INPUTS = tuple(decode_inputs(code)[1] for code in ACTIONS)
+
+PLAYER_FIELDS = (
+    "x", "y", "width", "height", "vel_x", "vel_y", "on_ground", "crouching",
+    "attack_timer", "facing", "lives", "damage_cooldown", "level",
+)
+# Nearby objects follow the player fields, nearest first and zero padded:
+# platforms and hazards as (dx, dy, width, height) of their top-left corner
+# relative to the player centre, collectibles as (dx, dy, kind) of their centre.
+OBS_SIZE = len(PLAYER_FIELDS) + 4 * ENV_NEAR_PLATFORMS + 4 * ENV_NEAR_HAZARDS + 3 * ENV_NEAR_COLLECTIBLES
+
+
+def _gap(rect, cx, cy):
+    dx = max(rect.left - cx, 0, cx - rect.right)
+    dy = max(rect.top - cy, 0, cy - rect.bottom)
+    return dx + dy
+
+
+class GameEnv:
+    def __init__(self, max_steps=ENV_MAX_STEPS):
+        self.max_steps = max_steps
+        self.session = None
+        self.steps = 0
+        self._seeds = random.Random()
+
+    def reset(self, seed=None):
+        # A seed fixes this reset and every later unseeded one, like gymnasium.
+        if seed is not None:
+            self._seeds.seed(seed)
+        self.session = GameSession(seed=self._seeds.getrandbits(32))
+        self.session.start_run(self.session.level.get_lab_door_spawn())
+        self.steps = 0
+        return self.observe(), {"seed": self.session.seed}
+
+    def step(self, action, out=None):
+        # Reward is the score gained this tick.
+        session = self.session
+        score = session.score
+        events = session.step(_ACTION_INPUTS[action])
+        self.steps += 1
+        terminated = session.game_over
+        truncated = not terminated and bool(self.max_steps) and self.steps >= self.max_steps
+        return self.observe(out), session.score - score, terminated, truncated, {"events": events}
+
+    def observe(self, out=None):
+        obs = np.zeros(OBS_SIZE, dtype=np.float32) if out is None else out
+        if out is not None:
+            obs.fill(0.0)
+        session = self.session
+        player = session.player
+        level = session.level
+        rect = player.rect
+        obs[:len(PLAYER_FIELDS)] = (
+            rect.x, rect.y, rect.width, rect.height, player.vel_x, player.vel_y,
+            player.on_ground, player.crouching, player.attack_timer, player.facing,
+            session.lives, session.damage_cooldown, level.level_index,
+        )
+
+        # A level holds only a handful of objects, so scanning them directly is cheaper
+        # here than the broadphase and numpy calls meant for the hot collision path.
+        cx, cy = rect.center
+        window = rect.inflate(2 * ENV_OBS_RANGE, 2 * ENV_OBS_RANGE)
+        offset = len(PLAYER_FIELDS)
+        for rects, count in ((level.platforms, ENV_NEAR_PLATFORMS), (level.hazards, ENV_NEAR_HAZARDS)):
+            nearby = sorted((_gap(r, cx, cy), n, r) for n, r in enumerate(rects) if window.colliderect(r))
+            for i, (_, _, r) in enumerate(nearby[:count]):
+                obs[offset + 4 * i:offset + 4 * i + 4] = (r.x - cx, r.y - cy, r.width, r.height)
+            offset += 4 * count
+
+        store = level.collectibles
+        n = store.count
+        nearby = []
+        reach_x = ENV_OBS_RANGE + rect.width // 2
+        reach_y = ENV_OBS_RANGE + rect.height // 2
+        columns = (store.x[:n].tolist(), store.y[:n].tolist(), store.w[:n].tolist(), store.h[:n].tolist())
+        for i, (x, y, w, h, taken, kind) in enumerate(zip(*columns, store.taken[:n].tolist(), store.kind[:n].tolist())):
+            dx = x + w // 2 - cx
+            dy = y + h // 2 - cy
+            if not taken and abs(dx) <= reach_x and abs(dy) <= reach_y:
+                nearby.append((abs(dx) + abs(dy), i, dx, dy, kind))
+        nearby.sort()
+        for i, (_, _, dx, dy, kind) in enumerate(nearby[:ENV_NEAR_COLLECTIBLES]):
+            obs[offset + 3 * i:offset + 3 * i + 3] = (dx, dy, kind)
+        return obs
+
+
+class _EnvBatch:
+    # A slice of the vector env; runs in a worker process or in-process.
+    def __init__(self, count, max_steps):
+        self.envs = [GameEnv(max_steps) for _ in range(count)]
+        self.obs = np.zeros((count, OBS_SIZE), dtype=np.float32)
+
+    def reset(self, seeds):
+        for i, (env, seed) in enumerate(zip(self.envs, seeds)):
+            env.reset(seed)
+            env.observe(self.obs[i])
+        return self.obs.copy()
+
+    def step(self, actions):
+        count = len(self.envs)
+        rewards = np.zeros(count, dtype=np.float32)
+        terminated = np.zeros(count, dtype=np.bool_)
+        truncated = np.zeros(count, dtype=np.bool_)
+        scores = np.zeros(count, dtype=np.int32)
+        final_obs = np.zeros((count, OBS_SIZE), dtype=np.float32)
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            _, rewards[i], terminated[i], truncated[i], _ = env.step(action, self.obs[i])
+            scores[i] = env.session.score
+            # Finished envs restart straight away; the returned observation is the new
+            # run's first and the one that ended the run goes back as final_obs.
+            if terminated[i] or truncated[i]:
+                final_obs[i] = self.obs[i]
+                env.reset()
+                env.observe(self.obs[i])
+        return self.obs.copy(), rewards, terminated, truncated, scores, final_obs
+
+
+def _worker(conn, count, max_steps):
+    batch = _EnvBatch(count, max_steps)
+    while True:
+        command, data = conn.recv()
+        if command == "reset":
+            conn.send(batch.reset(data))
+        elif command == "step":
+            conn.send(batch.step(data))
+        else:
+            break
+    conn.close()
+
+
+class VecGameEnv:
+    def __init__(self, num_envs, workers=None, max_steps=ENV_MAX_STEPS, context=None):
+        # workers=0 steps every env in this process, which is handy for debugging.
+        if workers is None:
+            workers = min(num_envs, os.cpu_count() or 1)
+        self.num_envs = num_envs
+        self.shards = [len(part) for part in np.array_split(np.arange(num_envs), max(1, workers)) if len(part)]
+        self.bounds = np.cumsum([0] + self.shards)
+        self._local = None
+        self._conns = []
+        self._procs = []
+        if workers == 0:
+            self._local = _EnvBatch(num_envs, max_steps)
+            return
+
+        ctx = multiprocessing.get_context(context)
+        for count in self.shards:
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(child, count, max_steps), daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def _scatter(self, command, items):
+        for conn, start, end in zip(self._conns, self.bounds[:-1], self.bounds[1:]):
+            conn.send((command, items[start:end]))
+        return [conn.recv() for conn in self._conns]
+
+    def reset(self, seed=None):
+        # Env i is seeded with seed + i so a batch is reproducible as a whole.
+        seeds = [None] * self.num_envs if seed is None else [seed + i for i in range(self.num_envs)]
+        if self._local is not None:
+            return self._local.reset(seeds), {}
+        return np.concatenate(self._scatter("reset", seeds)), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        if self._local is not None:
+            results = [self._local.step(actions)]
+        else:
+            results = self._scatter("step", actions)
+        obs, rewards, terminated, truncated, scores, final_obs = (np.concatenate(parts) for parts in zip(*results))
+        # Like gymnasium vector envs: final_obs rows are only valid where _final_obs is set,
+        # which lets agents bootstrap from the last state of a truncated run.
+        info = {"score": scores, "final_obs": final_obs, "_final_obs": terminated | truncated}
+        return obs, rewards, terminated, truncated, info
+
+    def close(self):
+        for conn in self._conns:
+            conn.send(("close", None))
+            conn.close()
+        for proc in self._procs:
+            proc.join(timeout=2.0)
+        self._conns = []
+        self._procs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,184 @@
+import glob
+import os
+import time
+
+import cv2
+
+
+class FrameSource:
+    # read() returns (ok, item). item is a BGR frame, or a list of 21 normalized,
+    # already mirrored (x, y) landmarks when provides_landmarks is True.
+    provides_landmarks = False
+    # Unpaced sources produce items as fast as they are consumed, so every item
+    # is processed instead of only the latest one.
+    paced = True
+    # Set once a finite source has nothing left to read.
+    finished = False
+
+    def open(self):
+        return True
+
+    def is_open(self):
+        return True
+
+    def read(self):
+        return False, None
+
+    def release(self):
+        pass
+
+
+class _PacedSource(FrameSource):
+    def __init__(self, fps, paced):
+        self.fps = fps
+        self.paced = paced
+        self._next_due = None
+
+    def _wait_turn(self):
+        if not self.paced or self.fps <= 0:
+            return
+        now = time.perf_counter()
+        if self._next_due is None:
+            self._next_due = now
+        elif self._next_due > now:
+            time.sleep(self._next_due - now)
+        self._next_due = max(self._next_due + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+
+
+class CameraSource(FrameSource):
+    def __init__(self, candidates=None):
+        self.candidates = candidates
+        self.cap = None
+
+    def _camera_candidates(self):
+        if self.candidates is not None:
+            return self.candidates
+        candidates = []
+        if hasattr(cv2, "CAP_DSHOW"):
+            candidates.append((0, cv2.CAP_DSHOW))
+        if hasattr(cv2, "CAP_MSMF"):
+            candidates.append((0, cv2.CAP_MSMF))
+        candidates.append((0, cv2.CAP_ANY))
+        candidates.append((1, cv2.CAP_ANY))
+        return candidates
+
+    def open(self):
+        self.release()
+        for index, backend in self._camera_candidates():
+            cap = cv2.VideoCapture(index, backend)
+            if not cap.isOpened():
+                cap.release()
+                continue
+
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            success = False
+            for _ in range(4):
+                success, _ = cap.read()
+                if success:
+                    break
+
+            if success:
+                self.cap = cap
+                return True
+            cap.release()
+        return False
+
+    def is_open(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class VideoFileSource(_PacedSource):
+    def __init__(self, path, loop=False, paced=True, fps=None):
+        super().__init__(fps or 0, paced)
+        self.path = path
+        self.loop = loop
+        self.cap = None
+
+    def open(self):
+        self.release()
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            cap.release()
+            return False
+        if not self.fps:
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.cap = cap
+        return True
+
+    def is_open(self):
+        return self.cap is not None
+
+    def read(self):
+        self._wait_turn()
+        success, frame = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+        if not success:
+            self.finished = True
+        return success, frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageSequenceSource(_PacedSource):
+    def __init__(self, paths, fps=30.0, loop=False, paced=True):
+        # paths: a directory, a glob pattern, or an explicit list of image files.
+        super().__init__(fps, paced)
+        if isinstance(paths, str):
+            pattern = os.path.join(paths, "*") if os.path.isdir(paths) else paths
+            paths = sorted(glob.glob(pattern))
+        self.paths = list(paths)
+        self.loop = loop
+        self.position = 0
+
+    def open(self):
+        self.position = 0
+        return bool(self.paths)
+
+    def read(self):
+        if self.position >= len(self.paths):
+            if not self.loop or not self.paths:
+                self.finished = True
+                return False, None
+            self.position = 0
+        self._wait_turn()
+        frame = cv2.imread(self.paths[self.position])
+        self.position += 1
+        return frame is not None, frame
+
+
+class SyntheticLandmarkSource(_PacedSource):
+    provides_landmarks = True
+
+    def __init__(self, landmark_sets, fps=30.0, loop=True, paced=True):
+        super().__init__(fps, paced)
+        self.landmark_sets = list(landmark_sets)
+        self.loop = loop
+        self.position = 0
+
+    def open(self):
+        self.position = 0
+        return bool(self.landmark_sets)
+
+    def read(self):
+        if self.position >= len(self.landmark_sets):
+            if not self.loop or not self.landmark_sets:
+                self.finished = True
+                return False, None
+            self.position = 0
+        self._wait_turn()
+        landmarks = self.landmark_sets[self.position]
+        self.position += 1
+        return True, landmarks
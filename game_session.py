@@ -0,0 +1,150 @@
+from level import Level
+from player import Player
+from profiler import NULL_PROFILER
+from settings import *
+
+
+class GameSession:
+    def __init__(self, max_lives=MAX_LIVES, seed=None, profiler=NULL_PROFILER, swept=SWEPT_COLLISION):
+        self.max_lives = max_lives
+        self.profiler = profiler
+        self.swept = swept
+        self.run_anchor_x = int(WIDTH * 0.58)
+        self.level = Level(seed)
+        self.seed = self.level.seed
+        self.player = Player(swept)
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.score = 0
+        self.core_bank = 0
+        self.coin_bank = 0
+        self.distance_m = 0.0
+        self.lives = self.max_lives
+        self.damage_cooldown = 0
+        self.game_over = False
+        self.frame = 0
+        # Render interpolation state: where the player stood before the last tick
+        # (None after a teleport) and how far the world scrolled during it.
+        self.prev_player_pos = None
+        self.world_shift = 0
+
+    def restart(self):
+        # Same seed, same course: restarts stay reproducible for replays.
+        self.level = Level(self.seed)
+        self.player = Player(self.swept)
+        self._reset_stats()
+        self.player.set_spawn(self.level.get_lab_door_spawn(), respawn_now=True)
+
+    def start_run(self, spawn_point):
+        self.player.set_spawn(spawn_point, respawn_now=True)
+        self.player.facing = 1
+        self.game_over = False
+
+    @property
+    def energy_pct(self):
+        return int(100 * max(0, self.lives) / self.max_lives)
+
+    def player_render_pos(self, alpha):
+        # Top-left to draw the player at, blended between the last two ticks.
+        rect = self.player.rect
+        if self.prev_player_pos is None:
+            return rect.topleft
+        prev_x, prev_y = self.prev_player_pos
+        x = prev_x + (rect.centerx - prev_x) * alpha
+        y = prev_y + (rect.bottom - prev_y) * alpha
+        return (int(round(x)) - rect.width // 2, int(round(y)) - rect.height)
+
+    def world_render_offset(self, alpha):
+        # The world has already moved by world_shift this tick; draw it part-way back.
+        return int(round(-self.world_shift * (1.0 - alpha)))
+
+    def step(self, inputs):
+        # Advances the simulation by one tick. inputs holds "direction" (-1, 0, 1) and
+        # "jump", "crouch", "attack" flags; returns the names of events that happened.
+        events = []
+        if self.game_over:
+            return events
+
+        level = self.level
+        player = self.player
+        profiler = self.profiler
+        self.frame += 1
+        self.prev_player_pos = player.rect.midbottom
+        self.world_shift = 0
+
+        if inputs.get("jump") and player.jump():
+            events.append("jump")
+        if inputs.get("attack"):
+            player.attack()
+            events.append("attack")
+        player.set_crouch(bool(inputs.get("crouch")))
+
+        prev_x = player.rect.x
+        # Where the player started this tick, kept in the scrolled world's frame for hazard sweeps.
+        prev_rect = player.rect.copy() if self.swept else None
+        with profiler.scope("physics"):
+            player.update(inputs.get("direction", 0), level.get_platforms(near=player.reach_rect()))
+        scroll_dx = 0
+        if player.rect.centerx > self.run_anchor_x:
+            scroll_dx = player.rect.centerx - self.run_anchor_x
+            player.rect.centerx = self.run_anchor_x
+            with profiler.scope("scroll"):
+                level.scroll_world(-scroll_dx)
+            self.world_shift = -scroll_dx
+            if prev_rect is not None:
+                prev_rect.x -= scroll_dx
+
+        delta_x = abs(player.rect.x - prev_x) + abs(scroll_dx)
+        if delta_x > 0:
+            self.distance_m += delta_x * 0.35
+
+        with profiler.scope("collisions"):
+            gained, cores, coins = level.collect(player.rect)
+        if gained > 0:
+            self.score += gained
+            self.core_bank += cores * 25
+            self.coin_bank += coins
+            self.distance_m += gained * 0.12
+            if cores > 0:
+                events.append("core")
+            if coins > 0:
+                events.append("coin")
+
+        if level.remaining_collectibles() == 0:
+            self.score += 30 + level.level_index * 5
+            self.coin_bank += 1
+            level.reset_collectibles()
+
+        if level.update_level_for_score(self.score):
+            player.respawn()
+            self.damage_cooldown = 28
+            self.prev_player_pos = None
+            self.world_shift = 0
+            prev_rect = None
+            events.append("level_up")
+
+        if self.damage_cooldown > 0:
+            self.damage_cooldown -= 1
+
+        with profiler.scope("collisions"):
+            hit = self.damage_cooldown == 0 and level.hit_hazard(player.rect, prev_rect)
+        if hit:
+            self.lives -= 1
+            self.damage_cooldown = 52
+            player.respawn()
+            self.prev_player_pos = None
+            events.append("hit")
+
+        if player.rect.top > HEIGHT:
+            self.lives -= 1
+            self.damage_cooldown = 52
+            player.respawn()
+            self.prev_player_pos = None
+            events.append("hit")
+
+        if self.lives <= 0:
+            self.game_over = True
+            events.append("game_over")
+
+        return events
@@ -1,83 +1,309 @@
+import threading
+import time
+from collections import deque
+
 import cv2
-import mediapipe as mp
+import numpy as np
+
+from frame_sources import CameraSource
+
+try:
+    import mediapipe as mp
+except ImportError:
+    mp = None
+
+from settings import (
+    CAMERA_RECONNECT_FRAMES,
+    CAMERA_SIZE,
+    CAMERA_RETRY_SECONDS,
+    GESTURE_INFERENCE_SIZE,
+    GESTURE_REDETECT_FRAMES,
+    GESTURE_ROI,
+    GESTURE_ROI_PADDING,
+    INFERENCE_RATE_WINDOW,
+)
+
 
 class GestureController:
-    def __init__(self):
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.6
-        )
-        self.drawer = mp.solutions.drawing_utils
-        self.cap = None
+    def __init__(self, inference_size=GESTURE_INFERENCE_SIZE, use_roi=GESTURE_ROI, preview_size=CAMERA_SIZE, source=None):
+        self.source = CameraSource() if source is None else source
+        self.hands = None
+        if not self.source.provides_landmarks:
+            # Synthetic landmark sources skip MediaPipe, so it is only needed for images.
+            if mp is None:
+                raise RuntimeError("mediapipe is required for image-based gesture sources")
+            self.mp_hands = mp.solutions.hands
+            self.hands = self.mp_hands.Hands(
+                max_num_hands=1,
+                min_detection_confidence=0.7,
+                min_tracking_confidence=0.6
+            )
+        self.inference_size = inference_size
+        self.use_roi = use_roi
+        self.roi = None
+        self.frames_since_detect = 0
+        self.preview_size = preview_size
         self.reconnect_frames = 0
-        self._open_camera()
         self.controls = {
             "direction": 0,
             "jump": False,
             "crouch": False,
             "attack": False,
             "label": "IDLE",
+            "landmarks": None,
         }
+        self.frame = None
+
+        # Single-slot buffer: the capture thread overwrites it, the inference worker takes it.
+        self._frame_lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._frame_lock)
+        self._latest_frame = None
+
+        # Conversion buffers are owned by the inference worker and reused every frame.
+        # Preview frames are triple buffered so the game loop never sees a partial write.
+        self._buffers = {}
+        self._preview_buffers = [
+            np.zeros((preview_size[1], preview_size[0], 3), dtype=np.uint8) for _ in range(3)
+        ]
+        self._preview_back = 0
+        self._preview_ready = 1
+        self._preview_front = 2
+        self._preview_fresh = False
+
+        self._result_lock = threading.Lock()
+        self._result = (self.idle_controls(), False)
+        self._result_times = deque(maxlen=INFERENCE_RATE_WINDOW)
+        self.results_published = 0
+
+        self._running = True
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="gesture-capture", daemon=True)
+        self._inference_thread = threading.Thread(target=self._inference_loop, name="gesture-inference", daemon=True)
+        self._capture_thread.start()
+        self._inference_thread.start()
+
+    def _open_source(self):
+        self.source.release()
+        if self.source.open():
+            self.reconnect_frames = 0
+            return True
+        return False
 
-    def _camera_candidates(self):
-        candidates = []
-        if hasattr(cv2, "CAP_DSHOW"):
-            candidates.append((0, cv2.CAP_DSHOW))
-        if hasattr(cv2, "CAP_MSMF"):
-            candidates.append((0, cv2.CAP_MSMF))
-        candidates.append((0, cv2.CAP_ANY))
-        candidates.append((1, cv2.CAP_ANY))
-        return candidates
-
-    def _open_camera(self):
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
-
-        for index, backend in self._camera_candidates():
-            cap = cv2.VideoCapture(index, backend)
-            if not cap.isOpened():
-                cap.release()
+    def _capture_loop(self):
+        source = self.source
+        while self._running:
+            if not source.is_open():
+                if not self._open_source():
+                    self._store_frame(None)
+                    time.sleep(CAMERA_RETRY_SECONDS)
                 continue
 
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-            success = False
-            for _ in range(4):
-                success, _ = cap.read()
-                if success:
+            success, frame = source.read()
+            if not success:
+                if source.finished:
                     break
+                self.reconnect_frames += 1
+                if self.reconnect_frames >= CAMERA_RECONNECT_FRAMES:
+                    self._store_frame(None)
+                    self._open_source()
+                else:
+                    time.sleep(0.005)
+                continue
+            self.reconnect_frames = 0
+            self._store_frame(frame, wait=not source.paced)
 
-            if success:
-                self.cap = cap
-                self.reconnect_frames = 0
-                return True
-            cap.release()
-        return False
+        source.release()
+        self._store_frame(None, wait=not source.paced)
+
+    def _store_frame(self, frame, wait=False):
+        with self._frame_ready:
+            # Unpaced sources hand over every item instead of overwriting the slot.
+            while wait and self._latest_frame is not None and self._running:
+                self._frame_ready.wait(0.1)
+            self._latest_frame = (frame, time.perf_counter())
+            self._frame_ready.notify_all()
+
+    def _take_frame(self, timeout):
+        with self._frame_ready:
+            if self._latest_frame is None:
+                self._frame_ready.wait(timeout)
+            item = self._latest_frame
+            self._latest_frame = None
+            self._frame_ready.notify_all()
+        return item
+
+    def _inference_loop(self):
+        while self._running:
+            item = self._take_frame(0.1)
+            if item is None:
+                continue
+
+            frame, captured_at = item
+            if frame is None:
+                self._publish(self.idle_controls(), False, captured_at, online=False)
+                continue
+
+            inference_start = time.perf_counter()
+            if self.source.provides_landmarks:
+                points = frame
+                inference_end = inference_start
+                controls = self._classify_controls(points)
+            else:
+                controls = self.idle_controls()
+                rgb_frame, roi = self._inference_input(frame)
+                results = self.hands.process(rgb_frame)
+                inference_end = time.perf_counter()
+
+                points = None
+                if results.multi_hand_landmarks:
+                    points = self._frame_points(results.multi_hand_landmarks[0], roi)
+                    controls = self._classify_controls(points)
+                    self._update_roi(points)
+                else:
+                    self.roi = None
+
+            controls["landmarks"] = points
+            controls["inference_start"] = inference_start
+            controls["inference_end"] = inference_end
+            controls["classified_at"] = time.perf_counter()
+            if not self.source.provides_landmarks:
+                self._render_preview(frame)
+            self._publish(controls, not self.source.provides_landmarks, captured_at)
 
-    def _finger_open(self, hand, tip, pip):
-        return hand.landmark[tip].y < hand.landmark[pip].y
+    def _buffer(self, name, shape):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            self._buffers[name] = buf
+        return buf
 
-    def _classify_controls(self, hand):
-        index_tip = hand.landmark[8]
-        wrist = hand.landmark[0]
+    def _inference_input(self, frame):
+        # Returns the RGB image handed to MediaPipe and the normalized (x, y, w, h)
+        # box of the raw, unmirrored frame it covers. Mirroring is applied to the
+        # landmarks afterwards instead of flipping pixels.
+        height, width = frame.shape[:2]
+        roi = (0.0, 0.0, 1.0, 1.0)
+        if self.use_roi and self.roi is not None and self.frames_since_detect < GESTURE_REDETECT_FRAMES:
+            self.frames_since_detect += 1
+            x0 = int((1.0 - self.roi[0] - self.roi[2]) * width)
+            y0 = int(self.roi[1] * height)
+            x1 = max(x0 + 1, int((1.0 - self.roi[0]) * width))
+            y1 = max(y0 + 1, int((self.roi[1] + self.roi[3]) * height))
+            frame = frame[y0:y1, x0:x1]
+            roi = (x0 / width, y0 / height, (x1 - x0) / width, (y1 - y0) / height)
+        else:
+            self.frames_since_detect = 0
+
+        if self.inference_size is None:
+            rgb = self._buffer("inference_rgb", frame.shape)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+            return rgb, roi
+
+        # Crops are only ever scaled down, keeping their aspect ratio, and
+        # letterboxed into the top-left of one fixed-size buffer, so the buffers are
+        # allocated once even though the ROI box changes size from frame to frame.
+        max_w, max_h = self.inference_size
+        crop_h, crop_w = frame.shape[:2]
+        scale = min(max_w / float(crop_w), max_h / float(crop_h), 1.0)
+        size = (max(1, int(crop_w * scale)), max(1, int(crop_h * scale)))
+        if scale < 1.0:
+            small = self._buffer("inference_bgr", (max_h, max_w, 3))[:size[1], :size[0]]
+            cv2.resize(frame, size, dst=small, interpolation=cv2.INTER_AREA)
+            frame = small
+
+        rgb = self._buffer("inference_rgb", (max_h, max_w, 3))
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb[:size[1], :size[0]])
+        rgb[size[1]:] = 0
+        rgb[:size[1], size[0]:] = 0
+        # Landmarks come back normalized to the whole buffer, padding included, so
+        # widen the box by the same factor the image fills less than the buffer.
+        rx, ry, rw, rh = roi
+        return rgb, (rx, ry, rw * max_w / size[0], rh * max_h / size[1])
+
+    def _frame_points(self, hand, roi):
+        rx, ry, rw, rh = roi
+        return [(1.0 - (rx + lm.x * rw), ry + lm.y * rh) for lm in hand.landmark]
+
+    def _update_roi(self, points):
+        if not self.use_roi:
+            return
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        w = max(xs) - min(xs)
+        h = max(ys) - min(ys)
+        # Pad around the hand and keep the box square-ish so fingers can extend.
+        side = max(w, h) * (1.0 + 2.0 * GESTURE_ROI_PADDING)
+        cx = (max(xs) + min(xs)) / 2.0
+        cy = (max(ys) + min(ys)) / 2.0
+        x0 = max(0.0, cx - side / 2.0)
+        y0 = max(0.0, cy - side / 2.0)
+        x1 = min(1.0, cx + side / 2.0)
+        y1 = min(1.0, cy + side / 2.0)
+        self.roi = (x0, y0, x1 - x0, y1 - y0)
+
+    def _render_preview(self, frame):
+        width, height = self.preview_size
+        small = self._buffer("preview_bgr", (height, width, 3))
+        cv2.resize(frame, (width, height), dst=small, interpolation=cv2.INTER_LINEAR)
+
+        # Mirror and swap BGR to RGB in a single pass into the back buffer.
+        np.copyto(self._preview_buffers[self._preview_back], small[:, ::-1, ::-1])
+
+    def _publish(self, controls, has_frame, captured_at, online=True):
+        now = time.perf_counter()
+        controls["time"] = captured_at
+        with self._result_lock:
+            self._result = (controls, has_frame)
+            if has_frame:
+                # Triple buffering: the finished back buffer becomes the ready one.
+                self._preview_back, self._preview_ready = self._preview_ready, self._preview_back
+                self._preview_fresh = True
+            if online:
+                self._result_times.append(now)
+                self.results_published += 1
+            else:
+                self._result_times.clear()
+
+    @property
+    def online(self):
+        return self.source.is_open() and not self.source.finished
+
+    @property
+    def inference_rate(self):
+        with self._result_lock:
+            if len(self._result_times) < 2:
+                return 0.0
+            span = self._result_times[-1] - self._result_times[0]
+            count = len(self._result_times) - 1
+        return count / span if span > 0 else 0.0
+
+    def result_age(self):
+        controls = self.controls
+        if "time" not in controls:
+            return float("inf")
+        return time.perf_counter() - controls["time"]
+
+    def _finger_open(self, points, tip, pip):
+        return points[tip][1] < points[pip][1]
+
+    def _classify_controls(self, points):
+        index_x, index_y = points[8]
+        wrist_y = points[0][1]
 
         open_count = sum([
-            self._finger_open(hand, 8, 6),
-            self._finger_open(hand, 12, 10),
-            self._finger_open(hand, 16, 14),
-            self._finger_open(hand, 20, 18),
+            self._finger_open(points, 8, 6),
+            self._finger_open(points, 12, 10),
+            self._finger_open(points, 16, 14),
+            self._finger_open(points, 20, 18),
         ])
 
         direction = 0
-        if index_tip.x < 0.38:
+        if index_x < 0.38:
             direction = -1
-        elif index_tip.x > 0.62:
+        elif index_x > 0.62:
             direction = 1
 
-        jump = index_tip.y < 0.27 and open_count >= 2
-        crouch = wrist.y > 0.72 and open_count >= 2
+        jump = index_y < 0.27 and open_count >= 2
+        crouch = wrist_y > 0.72 and open_count >= 2
         attack = open_count <= 1
 
         label = "IDLE"
@@ -98,40 +324,29 @@ class GestureController:
             "label": label,
         }
 
-    def get_gesture(self):
-        controls = {
+    def idle_controls(self):
+        return {
             "direction": 0,
             "jump": False,
             "crouch": False,
             "attack": False,
             "label": "IDLE",
+            "landmarks": None,
         }
 
-        if self.cap is None or not self.cap.isOpened():
-            self._open_camera()
-            return controls, None
-
-        success, frame = self.cap.read()
-        if not success:
-            self.reconnect_frames += 1
-            if self.reconnect_frames >= 20:
-                self._open_camera()
-            return controls, None
-        self.reconnect_frames = 0
-
-        frame = cv2.flip(frame, 1)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb_frame)
-
-        if results.multi_hand_landmarks:
-            hand = results.multi_hand_landmarks[0]
-            controls = self._classify_controls(hand)
-            self.drawer.draw_landmarks(frame, hand, self.mp_hands.HAND_CONNECTIONS)
-
+    def get_gesture(self):
+        with self._result_lock:
+            controls, has_frame = self._result
+            if self._preview_fresh:
+                self._preview_front, self._preview_ready = self._preview_ready, self._preview_front
+                self._preview_fresh = False
         self.controls = controls
-        return controls, frame
+        self.frame = self._preview_buffers[self._preview_front] if has_frame else None
+        return controls, self.frame
 
     def release(self):
-        if self.cap is not None and self.cap.isOpened():
-            self.cap.release()
-        self.hands.close()
+        self._running = False
+        self._inference_thread.join(timeout=2.0)
+        self._capture_thread.join(timeout=2.0)
+        if self.hands is not None:
+            self.hands.close()
@@ -0,0 +1,80 @@
+import csv
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from settings import LATENCY_WINDOW
+
+# Each stage is the gap between two timestamps on a gesture result:
+# time (capture) -> inference_start -> inference_end -> classified_at -> applied -> flipped.
+STAGES = (
+    ("queue", "time", "inference_start"),
+    ("inference", "inference_start", "inference_end"),
+    ("classify", "inference_end", "classified_at"),
+    ("handoff", "classified_at", "applied"),
+    ("render", "applied", "flipped"),
+    ("total", "time", "flipped"),
+)
+FIELDS = ("time", "inference_start", "inference_end", "classified_at", "applied", "flipped")
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyTracker:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self._pending = []
+        self._last_capture = None
+
+    def applied(self, controls, now=None):
+        # Each gesture result is counted once, the first time a tick uses it.
+        captured_at = controls.get("time")
+        if captured_at is None or captured_at == self._last_capture or "classified_at" not in controls:
+            return
+        self._last_capture = captured_at
+        sample = {field: controls.get(field) for field in FIELDS[:4]}
+        sample["applied"] = time.perf_counter() if now is None else now
+        self._pending.append(sample)
+
+    def flipped(self, now=None):
+        if not self._pending:
+            return
+        now = time.perf_counter() if now is None else now
+        for sample in self._pending:
+            sample["flipped"] = now
+            self.samples.append(sample)
+        self._pending = []
+
+    def stage_times(self, stage):
+        for name, start, end in STAGES:
+            if name == stage:
+                return np.array([s[end] - s[start] for s in self.samples], dtype=np.float64)
+        raise KeyError(stage)
+
+    def summary(self):
+        report = {}
+        for name, _, _ in STAGES:
+            times = self.stage_times(name) * 1000.0
+            if not len(times):
+                report[name] = {"count": 0}
+                continue
+            entry = {"count": int(len(times)), "mean_ms": float(times.mean())}
+            for pct, value in zip(PERCENTILES, np.percentile(times, PERCENTILES)):
+                entry[f"p{pct}_ms"] = float(value)
+            report[name] = entry
+        return report
+
+    def dump(self, path):
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(FIELDS + tuple(f"{name}_ms" for name, _, _ in STAGES))
+                for s in self.samples:
+                    writer.writerow(
+                        [f"{s[field]:.6f}" for field in FIELDS]
+                        + [f"{(s[end] - s[start]) * 1000.0:.3f}" for _, start, end in STAGES]
+                    )
+        else:
+            with open(path, "w") as handle:
+                json.dump({"summary": self.summary(), "samples": list(self.samples)}, handle, indent=2)
@@ -1,23 +1,63 @@
+import hashlib
 import math
 import pygame
 import random
+from collections import OrderedDict, deque
 
+from background import ParallaxLayer, cached_layer
+from broadphase import SpatialIndex
+from collectibles import KIND_CORE, CollectibleStore
 from settings import *
 
+# Finished chunk layouts keyed by (seed, level_index, chunk_id), least recently used first.
+_layouts = OrderedDict()
+
+
+def chunk_seed(seed, level_index, chunk_id):
+    # Stable across processes and platforms, unlike hash().
+    data = f"{seed}:{level_index}:{chunk_id}".encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def clear_layouts():
+    _layouts.clear()
+
+
+class Chunk:
+    # One slice of the course. Objects are laid out in chunk-local x while the
+    # chunk is being built, then moved into the world when it is committed.
+    def __init__(self, chunk_id):
+        self.id = chunk_id
+        self.platforms = []
+        self.hazards = []
+        self.items = []
+        self.keys = []
+        self.rows = []
+        # World-space right edge of the chunk's furthest object; screen x is
+        # right + Level.scrolled, so scrolling never touches it.
+        self.right = 0
+
 
 class Level:
-    def __init__(self):
+    def __init__(self, seed=None):
+        self.seed = random.getrandbits(32) if seed is None else seed
         self.level_index = 1
         self.play_top = 72
         self.play_bottom = HEIGHT - 108
         self.floor_y = self.play_bottom - 32
         self.platforms = []
         self.floating_platforms = []
-        self.collectibles = []
+        self.collectibles = CollectibleStore()
         self.hazards = []
-        self.rng = random.Random()
+        self.index = SpatialIndex()
+        self.chunks = deque()
+        self.scrolled = 0
         self.clouds = self._generate_clouds()
         self.mountains = self._generate_mountains()
+        self.parallax = [
+            ParallaxLayer("mountains", 0.08, self._draw_mountains, (self.play_bottom, MOUNTAIN_COLOR, MOUNTAIN_SHADOW)),
+            ParallaxLayer("clouds", 0.16, self._draw_clouds, (CLOUD_COLOR,)),
+        ]
         self._load_level(self.level_index)
 
     @staticmethod
@@ -82,67 +122,74 @@ class Level:
             top = self.floating_platforms[-1]
             self.hazards.append(pygame.Rect(top.centerx - 20, top.top - 10, 40, 10))
 
-        self._spawn_collectibles(idx)
+        self.index.clear()
+        self.index.insert(("platform", 0), self.platforms[0], fixed=True)
+        # Everything about a level derives from the run seed, so a seed replays the same course.
+        rng = random.Random(chunk_seed(self.seed, idx, 0))
+        self._spawn_collectibles(rng)
+        self._reset_stream(rng)
 
-    def _spawn_collectibles(self, idx):
-        rng = random.Random(100 + idx * 17)
-        self.collectibles = []
+    def _spawn_collectibles(self, rng):
+        self.collectibles.clear()
+        self._free_rows = []
         for plat in self.floating_platforms:
             x = rng.randint(plat.left + 22, plat.right - 22)
             y = plat.top - 14
-            self.collectibles.append(
-                {
-                    "rect": pygame.Rect(x - 9, y - 9, 18, 18),
-                    "taken": False,
-                    "kind": "core",
-                    "value": 24,
-                }
-            )
+            self.collectibles.add((x - 9, y - 9, 18, 18), "core", 24)
 
         ground = self.platforms[0]
         for _ in range(4):
             x = rng.randint(ground.left + 42, ground.right - 42)
             y = ground.top - 14
-            self.collectibles.append(
-                {
-                    "rect": pygame.Rect(x - 8, y - 8, 16, 16),
-                    "taken": False,
-                    "kind": "coin",
-                    "value": 12,
-                }
-            )
+            self.collectibles.add((x - 8, y - 8, 16, 16), "coin", 12)
 
     def reset_collectibles(self):
-        self._spawn_collectibles(self.level_index)
+        store = self.collectibles
+        for chunk in self.chunks:
+            for row in chunk.rows:
+                store.restore(row)
 
     def remaining_collectibles(self):
-        return sum(0 if item["taken"] else 1 for item in self.collectibles)
+        return self.collectibles.remaining
 
     def collect(self, player_rect):
         gained = 0
         cores = 0
         coins = 0
-        for item in self.collectibles:
-            if item["taken"]:
-                continue
-            if player_rect.colliderect(item["rect"].inflate(10, 10)):
-                item["taken"] = True
-                gained += item["value"]
-                if item["kind"] == "core":
-                    cores += 1
-                else:
-                    coins += 1
+        store = self.collectibles
+        for i in store.overlapping(player_rect, inflate=10):
+            store.take(i)
+            gained += int(store.value[i])
+            if store.kind[i] == KIND_CORE:
+                cores += 1
+            else:
+                coins += 1
         return gained, cores, coins
 
-    def hit_hazard(self, player_rect):
+    def hit_hazard(self, player_rect, prev_rect=None):
         hurtbox = player_rect.inflate(-6, -4)
-        for hazard in self.hazards:
-            if hurtbox.colliderect(hazard):
-                return True
-        return False
+        if prev_rect is None:
+            return bool(self.hazards_near(hurtbox))
+        # Player.update moves along x first, then y, so sweep the same two legs.
+        prev_box = prev_rect.inflate(-6, -4)
+        corner = pygame.Rect(hurtbox.x, prev_box.y, prev_box.width, prev_box.height)
+        across = prev_box.union(corner)
+        down = corner.union(hurtbox)
+        return bool(self.hazards_near(across) or self.hazards_near(down))
+
+    def get_platforms(self, near=None):
+        if near is None:
+            return self.platforms
+        return self.platforms_near(near)
+
+    def platforms_near(self, rect):
+        return self.index.query(rect, "platform")
+
+    def hazards_near(self, rect):
+        return self.index.query(rect, "hazard")
 
-    def get_platforms(self):
-        return self.platforms
+    def collectibles_near(self, rect):
+        return [self.collectibles[i] for i in self.collectibles.overlapping(rect)]
 
     def get_lab_door_rect(self):
         lab_main = pygame.Rect(52, self.play_bottom - 182, 206, 122)
@@ -152,75 +199,189 @@ class Level:
         door = self.get_lab_door_rect()
         return (door.centerx, self.floor_y)
 
-    def _random_platform_width(self):
-        w = 210 - self.level_index * 8 + self.rng.randint(-26, 26)
+    def _random_platform_width(self, rng):
+        w = 210 - self.level_index * 8 + rng.randint(-26, 26)
         return max(120, min(240, w))
 
-    def _random_platform_y(self):
+    def _random_platform_y(self, rng):
         top_min = self.play_top + 74
         top_max = self.floor_y - 74
         if top_min >= top_max:
             return self.floor_y - 110
-        return self.rng.randint(top_min, top_max)
-
-    def _recycle_floating_platforms(self):
-        if not self.floating_platforms:
-            return
-
-        far_right = max([WIDTH] + [plat.right for plat in self.floating_platforms])
-        for plat in self.floating_platforms:
-            if plat.right >= -40:
-                continue
-
-            gap = self.rng.randint(120, 230)
-            width = self._random_platform_width()
-            x = far_right + gap
-            y = self._random_platform_y()
-            plat.update(x, y, width, plat.height)
-            far_right = plat.right
-
-    def _recycle_hazards(self):
-        if not self.hazards:
-            return
-
-        far_right = max([WIDTH] + [hazard.right for hazard in self.hazards])
-        for hazard in self.hazards:
-            if hazard.right >= -24:
-                continue
-
-            width = 42 + self.level_index * 3 + self.rng.randint(-6, 8)
+        return rng.randint(top_min, top_max)
+
+    def _reset_stream(self, rng):
+        # The hand-built opening screen becomes chunk 0; generated chunks follow it.
+        self.chunks.clear()
+        self.scrolled = 0
+        self._serial = 0
+        self._pending = None
+        self._next_chunk_id = 1
+        opening = Chunk(0)
+        opening.platforms = list(self.floating_platforms)
+        opening.hazards = list(self.hazards)
+        opening.rows = list(range(self.collectibles.count))
+        for plat in opening.platforms:
+            opening.keys.append(self._index_insert("platform", plat))
+        for hazard in opening.hazards:
+            opening.keys.append(self._index_insert("hazard", hazard))
+        self.frontier = max([WIDTH] + [plat.right for plat in opening.platforms])
+        opening.right = self.frontier
+        self.chunks.append(opening)
+
+        # Cursors are chunk-local x positions of the next object of each type.
+        self._next_platform_x = rng.randint(120, 230)
+        self._next_hazard_x = rng.randint(130, 260)
+        self._next_coin_x = rng.randint(40, 220)
+        self._stream_chunks(None)
+
+    def _index_insert(self, kind, rect):
+        # Serial keys sort in creation order, which is also list order.
+        self._serial += 1
+        key = (kind, self._serial)
+        self.index.insert(key, rect)
+        return key
+
+    def _build_chunk(self, chunk):
+        # Lays out one object per step so generation can be spread over ticks. Each
+        # chunk draws from its own seed, so its layout depends only on the seed, the
+        # level, its id and the cursors left by the chunk before it.
+        rng = random.Random(chunk_seed(self.seed, self.level_index, chunk.id))
+        steps = 0
+        while self._next_platform_x < LEVEL_CHUNK_WIDTH:
+            plat = pygame.Rect(self._next_platform_x, self._random_platform_y(rng), self._random_platform_width(rng), 22)
+            chunk.platforms.append(plat)
+            pad = min(22, max(8, plat.width // 5))
+            x = rng.randint(plat.left + pad, plat.right - pad)
+            chunk.items.append(((x - 9, plat.top - 23, 18, 18), "core", 24))
+            self._next_platform_x = plat.right + rng.randint(120, 230)
+            steps += 1
+            yield
+
+        while self._next_hazard_x < LEVEL_CHUNK_WIDTH:
+            width = 42 + self.level_index * 3 + rng.randint(-6, 8)
             width = max(32, min(72, width))
-            if self.rng.random() < 0.35 and self.floating_platforms:
-                target = self.rng.choice(self.floating_platforms)
-                x = max(far_right + 70, target.centerx - width // 2)
+            x = self._next_hazard_x
+            y = self.floor_y - 12
+            targets = [plat for plat in chunk.platforms if plat.centerx - width // 2 >= x]
+            if rng.random() < 0.35 and targets:
+                target = rng.choice(targets)
+                x = target.centerx - width // 2
                 y = target.top - 12
+            hazard = pygame.Rect(x, y, width, 12)
+            chunk.hazards.append(hazard)
+            self._next_hazard_x = hazard.right + rng.randint(130, 260)
+            steps += 1
+            yield
+
+        while self._next_coin_x < LEVEL_CHUNK_WIDTH:
+            x = self._next_coin_x
+            chunk.items.append(((x - 8, self.floor_y - 22, 16, 16), "coin", 12))
+            self._next_coin_x = x + rng.randint(120, 300)
+            steps += 1
+            yield
+
+        _layouts[self._layout_key(chunk.id)] = (
+            tuple(tuple(plat) for plat in chunk.platforms),
+            tuple(tuple(hazard) for hazard in chunk.hazards),
+            tuple(chunk.items),
+            (self._next_platform_x, self._next_hazard_x, self._next_coin_x),
+            steps,
+        )
+        while len(_layouts) > LEVEL_CACHE_CHUNKS:
+            _layouts.popitem(last=False)
+
+    def _layout_key(self, chunk_id):
+        return (self.seed, self.level_index, chunk_id)
+
+    def _cached_chunk(self, chunk_id):
+        key = self._layout_key(chunk_id)
+        layout = _layouts.get(key)
+        if layout is None:
+            return None
+        _layouts.move_to_end(key)
+        platforms, hazards, items, cursors, steps = layout
+        chunk = Chunk(chunk_id)
+        chunk.platforms = [pygame.Rect(plat) for plat in platforms]
+        chunk.hazards = [pygame.Rect(hazard) for hazard in hazards]
+        chunk.items = list(items)
+        self._next_platform_x, self._next_hazard_x, self._next_coin_x = cursors
+        return chunk, steps
+
+    def _commit_chunk(self, chunk):
+        # Places a finished chunk at the frontier, in current screen coordinates.
+        left = self.frontier + self.scrolled
+        right = left + LEVEL_CHUNK_WIDTH
+        for plat in chunk.platforms:
+            plat.x += left
+            right = max(right, plat.right)
+            chunk.keys.append(self._index_insert("platform", plat))
+        for hazard in chunk.hazards:
+            hazard.x += left
+            right = max(right, hazard.right)
+            chunk.keys.append(self._index_insert("hazard", hazard))
+        self.floating_platforms.extend(chunk.platforms)
+        self.platforms.extend(chunk.platforms)
+        self.hazards.extend(chunk.hazards)
+
+        store = self.collectibles
+        for (x, y, w, h), kind, value in chunk.items:
+            rect = (x + left, y, w, h)
+            if self._free_rows:
+                row = self._free_rows.pop()
+                store.place(row, rect, kind, value)
             else:
-                x = far_right + self.rng.randint(130, 260)
-                y = self.floor_y - 12
-
-            hazard.update(int(x), int(y), width, 12)
-            far_right = hazard.right
-
-    def _respawn_collectible(self, item):
-        if item["kind"] == "core" and self.floating_platforms:
-            platform = self.rng.choice(self.floating_platforms)
-            pad = min(22, max(8, platform.width // 5))
-            if platform.width <= pad * 2:
-                x = platform.centerx
-            else:
-                x = self.rng.randint(platform.left + pad, platform.right - pad)
-            y = platform.top - 14
-            item["rect"].center = (x, y)
-        else:
-            right_edge = max([WIDTH] + [plat.right for plat in self.floating_platforms])
-            x = right_edge + self.rng.randint(40, 220)
-            item["rect"].center = (x, self.floor_y - 14)
-        item["taken"] = False
-
-    def _recycle_collectibles(self):
-        for item in self.collectibles:
-            if item["taken"] or item["rect"].right < -18:
-                self._respawn_collectible(item)
+                row = store.add(rect, kind, value)
+            chunk.rows.append(row)
+        chunk.items = []
+
+        chunk.right = right - self.scrolled
+        self.chunks.append(chunk)
+        self.frontier += LEVEL_CHUNK_WIDTH
+        self._next_platform_x -= LEVEL_CHUNK_WIDTH
+        self._next_hazard_x -= LEVEL_CHUNK_WIDTH
+        self._next_coin_x -= LEVEL_CHUNK_WIDTH
+
+    def _stream_chunks(self, budget):
+        # Keeps LEVEL_CHUNKS_AHEAD chunks built past the right edge of the screen,
+        # spending at most `budget` layout steps per call (None: no limit). A chunk
+        # about to scroll into view is always finished regardless of the budget.
+        while self.frontier + self.scrolled < WIDTH + LEVEL_CHUNKS_AHEAD * LEVEL_CHUNK_WIDTH:
+            if self._pending is None:
+                chunk_id = self._next_chunk_id
+                self._next_chunk_id += 1
+                cached = self._cached_chunk(chunk_id)
+                if cached is not None:
+                    # Reloading a level or restarting a run reuses the layout. It still
+                    # spends the same budget so it lands on the same tick as a fresh build.
+                    chunk, steps = cached
+                    self._pending = (chunk, iter(range(steps)))
+                else:
+                    chunk = Chunk(chunk_id)
+                    self._pending = (chunk, self._build_chunk(chunk))
+            chunk, steps = self._pending
+            urgent = budget is None or self.frontier + self.scrolled <= WIDTH
+            for _ in steps:
+                if not urgent:
+                    budget -= 1
+                    if budget <= 0:
+                        return
+            self._commit_chunk(chunk)
+            self._pending = None
+
+    def _retire_chunks(self):
+        store = self.collectibles
+        while self.chunks and self.chunks[0].right + self.scrolled < -LEVEL_RETIRE_MARGIN:
+            chunk = self.chunks.popleft()
+            for key in chunk.keys:
+                self.index.remove(key)
+            # Chunks retire oldest first, so their objects lead the flat lists.
+            del self.floating_platforms[:len(chunk.platforms)]
+            del self.platforms[1:1 + len(chunk.platforms)]
+            del self.hazards[:len(chunk.hazards)]
+            for row in chunk.rows:
+                store.take(row)
+                self._free_rows.append(row)
 
     def scroll_world(self, dx):
         if dx == 0:
@@ -232,38 +393,64 @@ class Level:
         for hazard in self.hazards:
             hazard.x += dx
 
-        for item in self.collectibles:
-            item["rect"].x += dx
+        self.collectibles.scroll(dx)
 
-        self.clouds = [(x + dx * 0.16, y, size) for x, y, size in self.clouds]
-        self.mountains = [
-            [(px + dx * 0.08, py) for (px, py) in tri]
-            for tri in self.mountains
-        ]
+        self.index.scroll(dx)
+        self.scrolled += dx
+        for layer in self.parallax:
+            layer.scroll(dx)
+
+        self._retire_chunks()
+        self._stream_chunks(LEVEL_GEN_BUDGET)
+
+    def _background_key(self, name, screen):
+        theme = (BG_TOP, BG_BOTTOM, HUD_PANEL_DARK, HUD_BLUE, HUD_WHITE)
+        return (name, screen.get_size(), self.play_bottom, theme)
+
+    def draw_background(self, screen, offset_x=0):
+        screen_size = screen.get_size()
+        sky, pos = cached_layer(self._background_key("sky", screen), screen_size, self._draw_sky)
+        screen.blit(sky, pos)
+
+        for layer in self.parallax:
+            layer.draw(screen, offset_x)
+
+        lab, pos = cached_layer(self._background_key("lab", screen), screen_size, self._draw_lab, alpha=True)
+        screen.blit(lab, pos)
+
+        runway = pygame.Rect(0, self.play_bottom - 8, WIDTH, 18)
+        pygame.draw.rect(screen, (84, 97, 122), runway)
+        shift = int((pygame.time.get_ticks() / 45.0) % 44)
+        for x in range(-shift, WIDTH + 44, 44):
+            pygame.draw.rect(screen, (231, 236, 248), (x, runway.top + 6, 20, 4))
 
-        self._recycle_floating_platforms()
-        self._recycle_hazards()
-        self._recycle_collectibles()
+        pygame.draw.rect(screen, GROUND_COLOR, (0, self.play_bottom, WIDTH, HEIGHT - self.play_bottom))
 
-    def draw_background(self, screen):
-        for y in range(HEIGHT):
-            t = y / max(HEIGHT - 1, 1)
+    def _draw_sky(self, surface):
+        width, height = surface.get_size()
+        for y in range(height):
+            t = y / max(height - 1, 1)
             r = int(BG_TOP[0] + (BG_BOTTOM[0] - BG_TOP[0]) * t)
             g = int(BG_TOP[1] + (BG_BOTTOM[1] - BG_TOP[1]) * t)
             b = int(BG_TOP[2] + (BG_BOTTOM[2] - BG_TOP[2]) * t)
-            pygame.draw.line(screen, (r, g, b), (0, y), (WIDTH, y))
+            pygame.draw.line(surface, (r, g, b), (0, y), (width, y))
 
+    def _draw_mountains(self, surface, shift):
         for tri in self.mountains:
-            pygame.draw.polygon(screen, MOUNTAIN_COLOR, tri)
+            tri = [(px + shift, py) for px, py in tri]
+            pygame.draw.polygon(surface, MOUNTAIN_COLOR, tri)
             shadow = [(tri[0][0] + 24, tri[0][1]), tri[1], (tri[2][0] - 24, tri[2][1])]
-            pygame.draw.polygon(screen, MOUNTAIN_SHADOW, shadow)
+            pygame.draw.polygon(surface, MOUNTAIN_SHADOW, shadow)
 
+    def _draw_clouds(self, surface, shift):
         for x, y, size in self.clouds:
-            pygame.draw.circle(screen, CLOUD_COLOR, (x, y), size // 2)
-            pygame.draw.circle(screen, CLOUD_COLOR, (x + size // 3, y - 6), size // 3)
-            pygame.draw.circle(screen, CLOUD_COLOR, (x - size // 3, y - 4), size // 3)
-            pygame.draw.ellipse(screen, CLOUD_COLOR, (x - size // 2, y - size // 4, size, size // 2))
+            x += shift
+            pygame.draw.circle(surface, CLOUD_COLOR, (x, y), size // 2)
+            pygame.draw.circle(surface, CLOUD_COLOR, (x + size // 3, y - 6), size // 3)
+            pygame.draw.circle(surface, CLOUD_COLOR, (x - size // 3, y - 4), size // 3)
+            pygame.draw.ellipse(surface, CLOUD_COLOR, (x - size // 2, y - size // 4, size, size // 2))
 
+    def _draw_lab(self, surface):
         lab_main = pygame.Rect(52, self.play_bottom - 182, 206, 122)
         lab_annex = pygame.Rect(lab_main.right - 56, lab_main.top + 30, 72, 84)
         roof = pygame.Rect(lab_main.left - 12, lab_main.top - 16, lab_main.width + 24, 20)
@@ -274,66 +461,58 @@ class Level:
             (lab_annex.right + 14, lab_annex.bottom + 20),
             (lab_main.left - 10, lab_main.bottom + 8),
         ]
-        pygame.draw.polygon(screen, (70, 82, 106), shadow)
+        pygame.draw.polygon(surface, (70, 82, 106), shadow)
 
-        pygame.draw.rect(screen, (119, 132, 159), lab_main, border_radius=8)
-        pygame.draw.rect(screen, (84, 95, 120), lab_main, width=3, border_radius=8)
-        pygame.draw.rect(screen, (101, 115, 142), lab_annex, border_radius=6)
-        pygame.draw.rect(screen, (77, 88, 111), lab_annex, width=3, border_radius=6)
+        pygame.draw.rect(surface, (119, 132, 159), lab_main, border_radius=8)
+        pygame.draw.rect(surface, (84, 95, 120), lab_main, width=3, border_radius=8)
+        pygame.draw.rect(surface, (101, 115, 142), lab_annex, border_radius=6)
+        pygame.draw.rect(surface, (77, 88, 111), lab_annex, width=3, border_radius=6)
 
-        pygame.draw.rect(screen, (68, 78, 103), roof, border_radius=8)
-        pygame.draw.rect(screen, (47, 56, 78), roof, width=3, border_radius=8)
+        pygame.draw.rect(surface, (68, 78, 103), roof, border_radius=8)
+        pygame.draw.rect(surface, (47, 56, 78), roof, width=3, border_radius=8)
         skylight = pygame.Rect(roof.left + 24, roof.top + 5, roof.width - 48, 8)
-        pygame.draw.rect(screen, (153, 221, 255), skylight, border_radius=4)
-        pygame.draw.rect(screen, (95, 143, 173), skylight, width=2, border_radius=4)
+        pygame.draw.rect(surface, (153, 221, 255), skylight, border_radius=4)
+        pygame.draw.rect(surface, (95, 143, 173), skylight, width=2, border_radius=4)
 
         for row in range(2):
             for col in range(3):
                 window = pygame.Rect(lab_main.left + 16 + col * 52, lab_main.top + 20 + row * 34, 34, 20)
-                pygame.draw.rect(screen, (28, 45, 72), window, border_radius=3)
+                pygame.draw.rect(surface, (28, 45, 72), window, border_radius=3)
                 pane = window.inflate(-4, -4)
-                pygame.draw.rect(screen, (125, 213, 255), pane, border_radius=2)
-                pygame.draw.line(screen, (210, 242, 255), (pane.left + 2, pane.top + 2), (pane.right - 2, pane.top + 2), 1)
+                pygame.draw.rect(surface, (125, 213, 255), pane, border_radius=2)
+                pygame.draw.line(surface, (210, 242, 255), (pane.left + 2, pane.top + 2), (pane.right - 2, pane.top + 2), 1)
 
         annex_window = pygame.Rect(lab_annex.left + 14, lab_annex.top + 18, 44, 22)
-        pygame.draw.rect(screen, (28, 45, 72), annex_window, border_radius=3)
-        pygame.draw.rect(screen, (132, 217, 255), annex_window.inflate(-4, -4), border_radius=2)
+        pygame.draw.rect(surface, (28, 45, 72), annex_window, border_radius=3)
+        pygame.draw.rect(surface, (132, 217, 255), annex_window.inflate(-4, -4), border_radius=2)
 
         door = self.get_lab_door_rect()
-        pygame.draw.rect(screen, (47, 57, 81), door, border_radius=5)
-        pygame.draw.rect(screen, (22, 29, 44), door, width=3, border_radius=5)
-        pygame.draw.circle(screen, (230, 188, 86), (door.right - 9, door.centery), 3)
+        pygame.draw.rect(surface, (47, 57, 81), door, border_radius=5)
+        pygame.draw.rect(surface, (22, 29, 44), door, width=3, border_radius=5)
+        pygame.draw.circle(surface, (230, 188, 86), (door.right - 9, door.centery), 3)
         step = pygame.Rect(door.left - 10, door.bottom - 2, door.width + 20, 8)
-        pygame.draw.rect(screen, (90, 104, 132), step, border_radius=3)
+        pygame.draw.rect(surface, (90, 104, 132), step, border_radius=3)
 
         for y in range(lab_main.top + 14, lab_main.bottom - 10, 24):
-            pygame.draw.line(screen, (142, 154, 179), (lab_main.left + 6, y), (lab_main.right - 6, y), 1)
+            pygame.draw.line(surface, (142, 154, 179), (lab_main.left + 6, y), (lab_main.right - 6, y), 1)
 
         mast_x = roof.right - 22
         mast_top = roof.top - 28
-        pygame.draw.line(screen, (196, 208, 232), (mast_x, roof.top + 2), (mast_x, mast_top), 2)
-        pygame.draw.circle(screen, HUD_BLUE, (mast_x, mast_top), 4)
-        pygame.draw.circle(screen, (166, 195, 232), (mast_x, mast_top), 9, width=1)
-        pygame.draw.circle(screen, (151, 178, 213), (mast_x, mast_top), 15, width=1)
+        pygame.draw.line(surface, (196, 208, 232), (mast_x, roof.top + 2), (mast_x, mast_top), 2)
+        pygame.draw.circle(surface, HUD_BLUE, (mast_x, mast_top), 4)
+        pygame.draw.circle(surface, (166, 195, 232), (mast_x, mast_top), 9, width=1)
+        pygame.draw.circle(surface, (151, 178, 213), (mast_x, mast_top), 15, width=1)
 
         vent = pygame.Rect(roof.left + 10, roof.top - 10, 18, 10)
-        pygame.draw.rect(screen, (92, 103, 126), vent, border_radius=2)
-        pygame.draw.rect(screen, (58, 66, 84), vent, width=2, border_radius=2)
+        pygame.draw.rect(surface, (92, 103, 126), vent, border_radius=2)
+        pygame.draw.rect(surface, (58, 66, 84), vent, width=2, border_radius=2)
 
         sign_left = pygame.Rect(lab_main.left + 20, lab_main.top - 36, 166, 24)
-        pygame.draw.rect(screen, HUD_PANEL_DARK, sign_left, border_radius=6)
-        pygame.draw.rect(screen, HUD_BLUE, sign_left, width=2, border_radius=6)
+        pygame.draw.rect(surface, HUD_PANEL_DARK, sign_left, border_radius=6)
+        pygame.draw.rect(surface, HUD_BLUE, sign_left, width=2, border_radius=6)
         font = pygame.font.SysFont("consolas", 15, bold=True)
         surf = font.render("RESEARCH LAB", True, HUD_WHITE)
-        screen.blit(surf, (sign_left.centerx - surf.get_width() // 2, sign_left.top + 3))
-
-        runway = pygame.Rect(0, self.play_bottom - 8, WIDTH, 18)
-        pygame.draw.rect(screen, (84, 97, 122), runway)
-        shift = int((pygame.time.get_ticks() / 45.0) % 44)
-        for x in range(-shift, WIDTH + 44, 44):
-            pygame.draw.rect(screen, (231, 236, 248), (x, runway.top + 6, 20, 4))
-
-        pygame.draw.rect(screen, GROUND_COLOR, (0, self.play_bottom, WIDTH, HEIGHT - self.play_bottom))
+        surface.blit(surf, (sign_left.centerx - surf.get_width() // 2, sign_left.top + 3))
 
     def _draw_stripes(self, screen, rect, offset=0):
         stripe_h = 8
@@ -344,8 +523,14 @@ class Level:
             pygame.draw.rect(screen, HAZARD_BLACK, (x + 12, y, 12, stripe_h))
             x += 24
 
-    def draw(self, screen):
-        for plat in self.platforms:
+    def draw(self, screen, offset_x=0):
+        for i, plat in enumerate(self.platforms):
+            if i > 0 and offset_x:
+                # Only floating platforms scroll; the ground stays put.
+                plat = plat.move(offset_x, 0)
+            if plat.right < 0 or plat.left > WIDTH:
+                # Chunks ahead of the camera are already streamed in but not visible yet.
+                continue
             pygame.draw.rect(screen, PLATFORM_COLOR, plat, border_radius=2)
             pygame.draw.rect(screen, GROUND_EDGE, (plat.left, plat.top, plat.width, 4), border_radius=2)
             highlight = pygame.Rect(plat.left, plat.top + 4, plat.width, 3)
@@ -353,6 +538,10 @@ class Level:
             self._draw_stripes(screen, plat, offset=7)
 
         for hazard in self.hazards:
+            if offset_x:
+                hazard = hazard.move(offset_x, 0)
+            if hazard.right < 0 or hazard.left > WIDTH:
+                continue
             spike_w = 14
             x = hazard.left
             while x + spike_w <= hazard.right:
@@ -361,18 +550,18 @@ class Level:
                 pygame.draw.polygon(screen, (92, 108, 132), points, width=1)
                 x += spike_w - 2
 
-    def draw_collectibles(self, screen):
+    def draw_collectibles(self, screen, offset_x=0):
         time_s = pygame.time.get_ticks() / 1000.0
-        for item in self.collectibles:
-            if item["taken"]:
+        store = self.collectibles
+        for i in store.active():
+            center = store.center(i)
+            center = (center[0] + offset_x, center[1])
+            if not -12 < center[0] < WIDTH + 12:
                 continue
-
-            rect = item["rect"]
-            center = rect.center
             pulse = 1.0 + 0.16 * math.sin(time_s * 4 + center[0] * 0.04)
             glow_r = int(9 * pulse)
 
-            if item["kind"] == "core":
+            if store.kind[i] == KIND_CORE:
                 pygame.draw.circle(screen, COLLECTIBLE_GLOW, center, glow_r)
                 pygame.draw.circle(screen, COLLECTIBLE_COLOR, center, 6)
                 pygame.draw.circle(screen, HUD_WHITE, center, 2)
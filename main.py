@@ -1,10 +1,15 @@
-import cv2
+import argparse
+
 import pygame
 
+from camera_preview import CameraPreview
+from game_session import GameSession
 from gesture_controller import GestureController
 from home_screen import HomeScreen
-from level import Level
+from latency import LatencyTracker
 from player import Player
+from profiler import Profiler
+from replay import InputRecorder, Replay
 from sound_manager import SoundManager
 from settings import *
 
@@ -31,12 +36,6 @@ def draw_hex_panel(screen, rect, fill, border, cut=12):
     pygame.draw.polygon(screen, border, pts, width=2)
 
 
-def camera_to_surface(frame, size):
-    resized = cv2.resize(frame, size)
-    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
-    return pygame.image.frombuffer(rgb.tobytes(), size, "RGB").copy()
-
-
 def draw_top_hud(screen, tiny_font, label_font, value_font, energy_pct, core_bank, score):
     left = pygame.Rect(16, 16, 290, 52)
     center = pygame.Rect(318, 16, 334, 52)
@@ -78,15 +77,17 @@ def draw_top_hud(screen, tiny_font, label_font, value_font, energy_pct, core_ban
     draw_text(screen, f"SCORE {score}", tiny_font, (0, 0, 0), (24, 74))
 
 
-def draw_camera_panel(screen, tiny_font, cam_frame):
+def draw_camera_panel(screen, tiny_font, cam_surface, inference_hz=0.0, stale=False):
     panel = pygame.Rect(WIDTH - CAMERA_SIZE[0] - 22, 16, CAMERA_SIZE[0] + 12, CAMERA_SIZE[1] + 34)
     pygame.draw.rect(screen, HUD_PANEL_DARK, panel, border_radius=10)
     pygame.draw.rect(screen, BUTTON_BORDER, panel, width=2, border_radius=10)
     draw_text(screen, "CAMERA", tiny_font, HUD_WHITE, (panel.left + 12, panel.top + 6))
+    if cam_surface is not None:
+        rate_color = WARNING_RED if stale else HUD_GREEN
+        draw_text(screen, f"{inference_hz:4.1f} Hz", tiny_font, rate_color, (panel.right - 82, panel.top + 6))
 
     frame_rect = pygame.Rect(panel.left + 6, panel.top + 26, CAMERA_SIZE[0], CAMERA_SIZE[1])
-    if cam_frame is not None:
-        cam_surface = camera_to_surface(cam_frame, CAMERA_SIZE)
+    if cam_surface is not None:
         screen.blit(cam_surface, frame_rect.topleft)
     else:
         pygame.draw.rect(screen, (45, 59, 92), frame_rect, border_radius=6)
@@ -130,7 +131,47 @@ def draw_bottom_hud(screen, tiny_font, value_font, score, distance_m, level_idx,
     pygame.draw.circle(screen, (255, 233, 168), (coin_panel.left + 32, coin_panel.top + 44), 5)
 
 
-def main():
+def draw_perf_overlay(screen, tiny_font, profiler):
+    panel = pygame.Rect(16, 100, 250, 26 + 58 + 18 * len(profiler.sections) + 8)
+    pygame.draw.rect(screen, HUD_PANEL_DARK, panel, border_radius=8)
+    pygame.draw.rect(screen, BUTTON_BORDER, panel, width=2, border_radius=8)
+    frame_ms = 1000.0 * profiler.frame_times[-1] if profiler.frame_times else 0.0
+    draw_text(screen, f"FPS {profiler.fps:5.1f}  {frame_ms:5.1f} ms", tiny_font, HUD_WHITE, (panel.left + 10, panel.top + 4))
+
+    # Frame-time graph, scaled so the frame budget sits halfway up.
+    graph = pygame.Rect(panel.left + 10, panel.top + 28, panel.width - 20, 50)
+    pygame.draw.rect(screen, (39, 53, 79), graph)
+    budget_ms = 1000.0 / FPS
+    pygame.draw.line(screen, HUD_GREEN, (graph.left, graph.centery), (graph.right - 1, graph.centery))
+    times = profiler.frame_times
+    if len(times) > 1:
+        step = graph.width / float(times.maxlen - 1)
+        points = []
+        for i, seconds in enumerate(times):
+            height = min(graph.height, 1000.0 * seconds / budget_ms * graph.height / 2.0)
+            points.append((graph.left + i * step, graph.bottom - height))
+        pygame.draw.lines(screen, HAZARD_YELLOW, False, points)
+
+    y = graph.bottom + 8
+    for name in profiler.sections:
+        ms = profiler.average_ms(name)
+        color = WARNING_RED if ms > budget_ms / 4.0 else HUD_BLUE
+        draw_text(screen, name.upper(), tiny_font, HUD_WHITE, (panel.left + 10, y))
+        value = tiny_font.render(f"{ms:.2f} ms", True, color)
+        screen.blit(value, (panel.right - 10 - value.get_width(), y))
+        y += 18
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gesture Runner")
+    parser.add_argument("--record", metavar="PATH", help="record the seed and per-tick inputs to PATH")
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded run in real time")
+    parser.add_argument("--latency-log", metavar="PATH", help="write gesture latency samples to PATH (.csv or .json) on exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     pygame.init()
     flags = pygame.FULLSCREEN | pygame.SCALED
     try:
@@ -138,6 +179,7 @@ def main():
     except pygame.error:
         screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
     pygame.display.set_caption("Gesture Runner")
+    Player.warm_sprite_cache()
     clock = pygame.time.Clock()
 
     tiny_font = pygame.font.SysFont("bahnschrift", 18, bold=True)
@@ -146,61 +188,63 @@ def main():
     panel_font = pygame.font.SysFont("consolas", 20, bold=True)
     over_font = pygame.font.SysFont("bahnschrift", 62, bold=True)
 
-    max_lives = 4
-    level = Level()
-    player = Player()
-    home_screen = HomeScreen(level)
+    replay = Replay.load(args.replay) if args.replay else None
+    session = replay.new_session() if replay else GameSession()
+    replay_inputs = iter(replay) if replay else None
+    recorder = InputRecorder(args.record, session.seed) if args.record and not replay else None
+    home_screen = HomeScreen(session.level)
     sound = SoundManager()
     controller = GestureController()
+    camera_preview = CameraPreview()
+    latency = LatencyTracker()
+    profiler = Profiler()
+    session.profiler = profiler
 
-    score = 0
-    core_bank = 0
-    coin_bank = 0
-    distance_m = 0.0
-    lives = max_lives
     gesture_label = "IDLE"
-    damage_cooldown = 0
     paused = False
-    game_over = False
-    cam_frame = None
+    cam_surface = None
     running = True
-    run_anchor_x = int(WIDTH * 0.58)
-    game_state = "menu"
-    game_over_sound_played = False
+    game_state = "playing" if replay else "menu"
+
+    # Physics runs at a fixed PHYSICS_HZ; rendering blends between the last two ticks.
+    tick_s = 1.0 / PHYSICS_HZ
+    accumulator = 0.0
+    frame_dt = 0.0
+    alpha = 1.0
+    pending_jump = False
+    pending_attack = False
 
     sound.set_enabled(home_screen.sound_on)
 
     while running:
-        for event in pygame.event.get():
+        with profiler.scope("events"):
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
+                elif event.key == pygame.K_F3:
+                    profiler.toggle()
                 elif game_state == "playing":
                     if event.key == pygame.K_p:
                         paused = not paused
+                        pending_jump = False
+                        pending_attack = False
                         sound.play("ui_click")
-                    if event.key in (pygame.K_SPACE, pygame.K_w, pygame.K_UP):
-                        if player.jump():
-                            sound.play("jump")
-                    if event.key == pygame.K_f:
-                        player.attack()
-                        sound.play("attack")
-                    if event.key == pygame.K_r and game_over:
-                        level = Level()
-                        player = Player()
-                        score = 0
-                        core_bank = 0
-                        coin_bank = 0
-                        distance_m = 0.0
-                        lives = max_lives
+                    # Presses while no ticks run are dropped, not queued for later.
+                    accepting = not paused and not session.game_over
+                    if event.key in (pygame.K_SPACE, pygame.K_w, pygame.K_UP) and accepting:
+                        pending_jump = True
+                    if event.key == pygame.K_f and accepting:
+                        pending_attack = True
+                    if event.key == pygame.K_r and session.game_over and not replay:
+                        session.restart()
+                        if recorder:
+                            recorder.mark_restart()
                         gesture_label = "IDLE"
-                        damage_cooldown = 0
-                        player.set_spawn(level.get_lab_door_spawn(), respawn_now=True)
                         paused = False
-                        game_over = False
-                        game_over_sound_played = False
                         sound.play("ui_click")
 
             if game_state == "menu":
@@ -209,11 +253,9 @@ def main():
                     sound.set_enabled(home_screen.sound_on)
                     sound.play("ui_click")
                 elif menu_action == "run":
-                    player.set_spawn(home_screen.start_game_from_menu(), respawn_now=True)
-                    player.facing = 1
+                    session.start_run(home_screen.start_game_from_menu())
+                    accumulator = 0.0
                     paused = False
-                    game_over = False
-                    game_over_sound_played = False
                     sound.play("ui_click")
                     game_state = "playing"
 
@@ -226,90 +268,70 @@ def main():
                 move_dir = 1
 
             manual_crouch = keys[pygame.K_s] or keys[pygame.K_DOWN]
-            controls, cam_frame = controller.get_gesture()
+            with profiler.scope("gesture"):
+                controls, cam_frame = controller.get_gesture()
+                cam_surface = camera_preview.update(cam_frame, controls["landmarks"])
+            gesture_stale = controller.result_age() > GESTURE_STALE_SECONDS
+            if gesture_stale:
+                controls = controller.idle_controls()
             if controls["direction"] != 0:
                 move_dir = controls["direction"]
-            if controls["jump"]:
-                if player.jump():
-                    sound.play("jump")
-            if controls["attack"]:
-                player.attack()
-                sound.play("attack")
-            player.set_crouch((controls["crouch"] or manual_crouch) and not paused)
             gesture_label = controls["label"]
 
-            if not game_over and not paused:
-                prev_x = player.rect.x
-                player.update(move_dir, level.get_platforms())
-                scroll_dx = 0
-                if player.rect.centerx > run_anchor_x:
-                    scroll_dx = player.rect.centerx - run_anchor_x
-                    player.rect.centerx = run_anchor_x
-                    level.scroll_world(-scroll_dx)
-
-                delta_x = abs(player.rect.x - prev_x) + abs(scroll_dx)
-                if delta_x > 0:
-                    distance_m += delta_x * 0.35
-
-                gained, cores, coins = level.collect(player.rect)
-                if gained > 0:
-                    score += gained
-                    core_bank += cores * 25
-                    coin_bank += coins
-                    distance_m += gained * 0.12
-                    if cores > 0:
-                        sound.play("core")
-                    if coins > 0:
-                        sound.play("coin")
-
-                if level.remaining_collectibles() == 0:
-                    score += 30 + level.level_index * 5
-                    coin_bank += 1
-                    level.reset_collectibles()
-
-                if level.update_level_for_score(score):
-                    player.respawn()
-                    damage_cooldown = 28
-                    sound.play("level_up")
-
-                if damage_cooldown > 0:
-                    damage_cooldown -= 1
-
-                if damage_cooldown == 0 and level.hit_hazard(player.rect):
-                    lives -= 1
-                    damage_cooldown = 52
-                    player.respawn()
-                    sound.play("hit")
-
-                if player.rect.top > HEIGHT:
-                    lives -= 1
-                    damage_cooldown = 52
-                    player.respawn()
-                    sound.play("hit")
-
-                if lives <= 0:
-                    game_over = True
-                    if not game_over_sound_played:
-                        sound.play("game_over")
-                        game_over_sound_played = True
-
-            level.draw_background(screen)
-            level.draw(screen)
-            level.draw_collectibles(screen)
-            player.draw(screen)
-
-            energy_pct = int(100 * max(0, lives) / max_lives)
-            draw_top_hud(screen, tiny_font, label_font, value_font, energy_pct, core_bank, score)
-            draw_camera_panel(screen, tiny_font, cam_frame)
-            draw_bottom_hud(screen, tiny_font, panel_font, score, distance_m, level.level_index, coin_bank)
-
-            if paused and not game_over:
+            # A replay may restart after game over, so it keeps ticking through it.
+            if not paused and (replay or not session.game_over):
+                # Cap the backlog so a long stall costs a brief slowdown, not a spiral.
+                accumulator = min(accumulator + frame_dt, tick_s * MAX_CATCHUP_TICKS)
+                while accumulator >= tick_s:
+                    if replay:
+                        restart, inputs = next(replay_inputs, (False, None))
+                        if inputs is None:
+                            running = False
+                            break
+                        if restart:
+                            session.restart()
+                    else:
+                        if not gesture_stale:
+                            latency.applied(controls)
+                        inputs = {
+                            "direction": move_dir,
+                            "jump": pending_jump or controls["jump"],
+                            "crouch": controls["crouch"] or manual_crouch,
+                            "attack": pending_attack or controls["attack"],
+                        }
+                        if recorder:
+                            recorder.record(inputs)
+                    # Key presses are edges: they apply to exactly one tick.
+                    pending_jump = False
+                    pending_attack = False
+                    for name in session.step(inputs):
+                        sound.play(name)
+                    accumulator -= tick_s
+                alpha = accumulator / tick_s
+
+            level = session.level
+            world_dx = session.world_render_offset(alpha)
+            with profiler.scope("background"):
+                level.draw_background(screen, world_dx)
+            with profiler.scope("world"):
+                level.draw(screen, world_dx)
+                level.draw_collectibles(screen, world_dx)
+                session.player.draw(screen, session.player_render_pos(alpha))
+
+            with profiler.scope("hud"):
+                draw_top_hud(screen, tiny_font, label_font, value_font, session.energy_pct, session.core_bank, session.score)
+                draw_camera_panel(screen, tiny_font, cam_surface, controller.inference_rate, gesture_stale)
+                draw_bottom_hud(
+                    screen, tiny_font, panel_font, session.score, session.distance_m, level.level_index, session.coin_bank
+                )
+
+            if paused and not session.game_over:
                 overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
                 overlay.fill((8, 14, 28, 120))
                 screen.blit(overlay, (0, 0))
                 draw_text(screen, "PAUSED", over_font, HUD_WHITE, (WIDTH // 2 - 120, HEIGHT // 2 - 60))
 
-            if game_over:
+            if session.game_over:
                 overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
                 overlay.fill((10, 18, 35, 170))
                 screen.blit(overlay, (0, 0))
@@ -324,9 +346,19 @@ def main():
         else:
             home_screen.draw(screen)
 
-        pygame.display.flip()
-        clock.tick(FPS)
+        if profiler.enabled:
+            draw_perf_overlay(screen, tiny_font, profiler)
+
+        with profiler.scope("flip"):
+            pygame.display.flip()
+        latency.flipped()
+        frame_dt = clock.tick(FPS) / 1000.0
+        profiler.end_frame(frame_dt)
 
+    if recorder:
+        recorder.close()
+    if args.latency_log:
+        latency.dump(args.latency_log)
     controller.release()
     pygame.quit()
 
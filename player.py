@@ -1,8 +1,14 @@
+import math
 import pygame
 from settings import *
 
+SPRITE_PADDING = 48
+
 class Player:
-    def __init__(self):
+    _sprites = {}
+
+    def __init__(self, swept=SWEPT_COLLISION):
+        self.swept = swept
         self.rect = pygame.Rect(0, 0, PLAYER_WIDTH, PLAYER_HEIGHT)
         self.rect.midbottom = (WIDTH // 2, HEIGHT - 142)
         self.spawn_point = self.rect.midbottom
@@ -38,14 +44,23 @@ class Player:
     def attack(self):
         self.attack_timer = ATTACK_FRAMES
 
+    def reach_rect(self):
+        # Area update() can touch this frame; used for broadphase platform queries.
+        reach_x = int(math.ceil(PLAYER_SPEED)) + 1
+        reach_y = int(math.ceil(max(abs(self.vel_y) + GRAVITY, MAX_FALL_SPEED))) + 1
+        return self.rect.inflate(reach_x * 2, reach_y * 2)
+
     def update(self, move_dir, platforms):
         self.vel_x = move_dir * PLAYER_SPEED
         if move_dir != 0:
             self.facing = 1 if move_dir > 0 else -1
 
         # Horizontal motion and collision
-        self.rect.x += int(round(self.vel_x))
-        self.rect.x = max(0, min(self.rect.x, WIDTH - self.rect.width))
+        target_x = max(0, min(self.rect.x + int(round(self.vel_x)), WIDTH - self.rect.width))
+        if self.swept:
+            self._sweep_x(target_x - self.rect.x, platforms)
+        else:
+            self.rect.x = target_x
         for plat in platforms:
             if self.rect.colliderect(plat):
                 if self.vel_x > 0:
@@ -55,8 +70,14 @@ class Player:
 
         # Vertical motion and collision
         self.vel_y = min(self.vel_y + GRAVITY, MAX_FALL_SPEED)
-        self.rect.y += int(round(self.vel_y))
         self.on_ground = False
+        if self.swept:
+            step_y = int(round(self.vel_y))
+            if self._sweep_y(step_y, platforms):
+                self.vel_y = 0
+                self.on_ground = step_y > 0
+        else:
+            self.rect.y += int(round(self.vel_y))
         for plat in platforms:
             if self.rect.colliderect(plat):
                 if self.vel_y > 0:
@@ -70,6 +91,35 @@ class Player:
         if self.attack_timer > 0:
             self.attack_timer -= 1
 
+    def _sweep_x(self, dx, platforms):
+        # Stops at the first platform edge crossed on the way; overlaps that
+        # already existed are left to the regular push-out pass.
+        rect = self.rect
+        for plat in platforms:
+            if rect.top >= plat.bottom or rect.bottom <= plat.top:
+                continue
+            if dx > 0 and rect.right <= plat.left < rect.right + dx:
+                dx = plat.left - rect.right
+            elif dx < 0 and rect.left + dx < plat.right <= rect.left:
+                dx = plat.right - rect.left
+        rect.x += dx
+
+    def _sweep_y(self, dy, platforms):
+        # Returns True when the move ended against a platform.
+        rect = self.rect
+        contact = False
+        for plat in platforms:
+            if rect.left >= plat.right or rect.right <= plat.left:
+                continue
+            if dy > 0 and rect.bottom <= plat.top < rect.bottom + dy:
+                dy = plat.top - rect.bottom
+                contact = True
+            elif dy < 0 and rect.top + dy < plat.bottom <= rect.top:
+                dy = plat.bottom - rect.top
+                contact = True
+        rect.y += dy
+        return contact
+
     def jump(self):
         if self.on_ground:
             self.vel_y = JUMP_STRENGTH
@@ -77,44 +127,75 @@ class Player:
             return True
         return False
 
-    def draw(self, screen):
-        shadow_w = int(self.rect.width * 1.5)
-        shadow_h = 6 if self.crouching else 8
+    @classmethod
+    def warm_sprite_cache(cls):
+        for crouching, height in ((False, PLAYER_HEIGHT), (True, PLAYER_CROUCH_HEIGHT)):
+            for facing in (-1, 1):
+                for attack_timer in range(ATTACK_FRAMES + 1):
+                    cls._sprite((PLAYER_WIDTH, height), crouching, facing, attack_timer)
+
+    @classmethod
+    def _sprite(cls, size, crouching, facing, attack_timer):
+        # The alien only depends on these few values, so each pose is drawn once.
+        key = (size, crouching, facing, attack_timer)
+        sprite = cls._sprites.get(key)
+        if sprite is None:
+            pad = SPRITE_PADDING
+            canvas = pygame.Surface((size[0] + pad * 2, size[1] + pad * 2), pygame.SRCALPHA)
+            rect = pygame.Rect((pad, pad), size)
+            cls._draw_pose(canvas, rect, crouching, facing, attack_timer)
+            bounds = canvas.get_bounding_rect()
+            surface = canvas.subsurface(bounds).copy()
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            sprite = (surface, (bounds.left - pad, bounds.top - pad))
+            cls._sprites[key] = sprite
+        return sprite
+
+    def draw(self, screen, pos=None):
+        left, top = self.rect.topleft if pos is None else pos
+        surface, offset = self._sprite(self.rect.size, self.crouching, self.facing, self.attack_timer)
+        screen.blit(surface, (left + offset[0], top + offset[1]))
+
+    @staticmethod
+    def _draw_pose(surface, rect, crouching, facing, attack_timer):
+        shadow_w = int(rect.width * 1.5)
+        shadow_h = 6 if crouching else 8
         shadow = pygame.Rect(0, 0, shadow_w, shadow_h)
-        shadow.center = (self.rect.centerx + self.facing, self.rect.bottom - 2)
-        pygame.draw.ellipse(screen, (55, 73, 116), shadow)
-        pygame.draw.ellipse(screen, (78, 96, 136), shadow.inflate(-10, -2), width=1)
+        shadow.center = (rect.centerx + facing, rect.bottom - 2)
+        pygame.draw.ellipse(surface, (55, 73, 116), shadow)
+        pygame.draw.ellipse(surface, (78, 96, 136), shadow.inflate(-10, -2), width=1)
 
-        torso = pygame.Rect(self.rect.left + 4, self.rect.top + 9, self.rect.width - 8, self.rect.height - 10)
-        if self.crouching:
+        torso = pygame.Rect(rect.left + 4, rect.top + 9, rect.width - 8, rect.height - 10)
+        if crouching:
             torso.y += 2
             torso.height -= 2
 
-        arm_w = max(5, self.rect.width // 4)
+        arm_w = max(5, rect.width // 4)
         left_arm = pygame.Rect(torso.left - arm_w + 2, torso.top + 8, arm_w, torso.height - 10)
         right_arm = pygame.Rect(torso.right - 2, torso.top + 8, arm_w, torso.height - 10)
-        pygame.draw.ellipse(screen, (87, 206, 238), left_arm)
-        pygame.draw.ellipse(screen, (87, 206, 238), right_arm)
-        pygame.draw.ellipse(screen, (66, 165, 204), left_arm, width=1)
-        pygame.draw.ellipse(screen, (66, 165, 204), right_arm, width=1)
+        pygame.draw.ellipse(surface, (87, 206, 238), left_arm)
+        pygame.draw.ellipse(surface, (87, 206, 238), right_arm)
+        pygame.draw.ellipse(surface, (66, 165, 204), left_arm, width=1)
+        pygame.draw.ellipse(surface, (66, 165, 204), right_arm, width=1)
 
-        pygame.draw.ellipse(screen, (95, 220, 247), torso)
+        pygame.draw.ellipse(surface, (95, 220, 247), torso)
         belly_highlight = torso.inflate(-8, -10)
         belly_highlight.move_ip(2, -1)
-        pygame.draw.ellipse(screen, (188, 247, 255), belly_highlight)
-        pygame.draw.ellipse(screen, (62, 163, 206), torso, width=2)
+        pygame.draw.ellipse(surface, (188, 247, 255), belly_highlight)
+        pygame.draw.ellipse(surface, (62, 163, 206), torso, width=2)
 
         left_foot = pygame.Rect(torso.centerx - 10, torso.bottom - 4, 9, 6)
         right_foot = pygame.Rect(torso.centerx + 1, torso.bottom - 4, 9, 6)
-        pygame.draw.ellipse(screen, (93, 214, 242), left_foot)
-        pygame.draw.ellipse(screen, (93, 214, 242), right_foot)
-        pygame.draw.ellipse(screen, (61, 155, 193), left_foot, width=1)
-        pygame.draw.ellipse(screen, (61, 155, 193), right_foot, width=1)
+        pygame.draw.ellipse(surface, (93, 214, 242), left_foot)
+        pygame.draw.ellipse(surface, (93, 214, 242), right_foot)
+        pygame.draw.ellipse(surface, (61, 155, 193), left_foot, width=1)
+        pygame.draw.ellipse(surface, (61, 155, 193), right_foot, width=1)
 
-        head_radius = max(14, self.rect.width // 2 + 5)
-        if self.crouching:
+        head_radius = max(14, rect.width // 2 + 5)
+        if crouching:
             head_radius -= 2
-        head_center = (self.rect.centerx, torso.top - 6)
+        head_center = (rect.centerx, torso.top - 6)
 
         tip_points = []
         for side in (-1, 1):
@@ -124,46 +205,46 @@ class Player:
             )
             tip = (base[0] + side * 6, base[1] - 14)
             tip_points.append((tip, side))
-            pygame.draw.line(screen, (126, 236, 255), base, tip, 2)
+            pygame.draw.line(surface, (126, 236, 255), base, tip, 2)
 
-        pygame.draw.circle(screen, (103, 229, 255), head_center, head_radius)
+        pygame.draw.circle(surface, (103, 229, 255), head_center, head_radius)
         face_glow_center = (head_center[0] - int(head_radius * 0.22), head_center[1] - int(head_radius * 0.3))
-        pygame.draw.circle(screen, (198, 250, 255), face_glow_center, int(head_radius * 0.58))
+        pygame.draw.circle(surface, (198, 250, 255), face_glow_center, int(head_radius * 0.58))
         jaw_shadow = pygame.Rect(head_center[0] - head_radius + 2, head_center[1] + 4, head_radius * 2 - 4, head_radius - 2)
-        pygame.draw.ellipse(screen, (63, 182, 225), jaw_shadow)
-        pygame.draw.circle(screen, (61, 168, 209), head_center, head_radius, width=2)
+        pygame.draw.ellipse(surface, (63, 182, 225), jaw_shadow)
+        pygame.draw.circle(surface, (61, 168, 209), head_center, head_radius, width=2)
 
         for tip, side in tip_points:
-            pygame.draw.circle(screen, (112, 234, 255), tip, 4)
-            pygame.draw.circle(screen, (211, 251, 255), (tip[0] - side, tip[1] - 1), 2)
+            pygame.draw.circle(surface, (112, 234, 255), tip, 4)
+            pygame.draw.circle(surface, (211, 251, 255), (tip[0] - side, tip[1] - 1), 2)
 
         eye_w = int(head_radius * 0.74)
         eye_h = int(head_radius * 0.82)
         eye_y = head_center[1] + int(head_radius * 0.12)
         eye_dx = int(head_radius * 0.5)
-        look_shift = self.facing
+        look_shift = facing
         left_eye = pygame.Rect(0, 0, eye_w, eye_h)
         right_eye = pygame.Rect(0, 0, eye_w, eye_h)
         left_eye.center = (head_center[0] - eye_dx + look_shift, eye_y)
         right_eye.center = (head_center[0] + eye_dx + look_shift, eye_y)
         for eye in (left_eye, right_eye):
-            pygame.draw.ellipse(screen, (18, 27, 47), eye)
+            pygame.draw.ellipse(surface, (18, 27, 47), eye)
             eye_inner = eye.inflate(-4, -6)
             eye_inner.move_ip(1, -1)
-            pygame.draw.ellipse(screen, (36, 49, 82), eye_inner)
+            pygame.draw.ellipse(surface, (36, 49, 82), eye_inner)
             glint_pos = (eye.left + eye.width - 7, eye.top + 6)
-            pygame.draw.circle(screen, HUD_WHITE, glint_pos, 3)
+            pygame.draw.circle(surface, HUD_WHITE, glint_pos, 3)
 
-        pygame.draw.circle(screen, (26, 70, 104), (head_center[0] - 3, head_center[1] + int(head_radius * 0.34)), 1)
-        pygame.draw.circle(screen, (26, 70, 104), (head_center[0] + 3, head_center[1] + int(head_radius * 0.34)), 1)
+        pygame.draw.circle(surface, (26, 70, 104), (head_center[0] - 3, head_center[1] + int(head_radius * 0.34)), 1)
+        pygame.draw.circle(surface, (26, 70, 104), (head_center[0] + 3, head_center[1] + int(head_radius * 0.34)), 1)
         mouth_rect = pygame.Rect(head_center[0] - 6, head_center[1] + int(head_radius * 0.38), 12, 8)
-        pygame.draw.arc(screen, (26, 78, 112), mouth_rect, 0.25, 2.9, 2)
+        pygame.draw.arc(surface, (26, 78, 112), mouth_rect, 0.25, 2.9, 2)
 
-        if self.attack_timer > 0:
-            pulse = self.attack_timer / float(ATTACK_FRAMES)
-            hand = (torso.centerx + self.facing * (torso.width // 2 + 2), torso.centery + 2)
-            bolt = (hand[0] + self.facing * (10 + int(8 * pulse)), hand[1] - 2)
-            pygame.draw.line(screen, ATTACK_COLOR, hand, bolt, 4)
+        if attack_timer > 0:
+            pulse = attack_timer / float(ATTACK_FRAMES)
+            hand = (torso.centerx + facing * (torso.width // 2 + 2), torso.centery + 2)
+            bolt = (hand[0] + facing * (10 + int(8 * pulse)), hand[1] - 2)
+            pygame.draw.line(surface, ATTACK_COLOR, hand, bolt, 4)
             orb_r = 4 + int(3 * pulse)
-            pygame.draw.circle(screen, (120, 238, 255), bolt, orb_r)
-            pygame.draw.circle(screen, HUD_WHITE, bolt, max(2, orb_r - 3))
+            pygame.draw.circle(surface, (120, 238, 255), bolt, orb_r)
+            pygame.draw.circle(surface, HUD_WHITE, bolt, max(2, orb_r - 3))
@@ -0,0 +1,79 @@
+import time
+from collections import deque
+
+from settings import PROFILER_HISTORY
+
+SECTIONS = ("events", "gesture", "physics", "scroll", "collisions", "background", "world", "hud", "flip")
+
+
+class _NullScope:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    __slots__ = ("totals", "name", "start")
+
+    def __init__(self, totals, name):
+        self.totals = totals
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # A section entered several times in one frame (e.g. per physics tick) adds up.
+        self.totals[self.name] = self.totals.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled=False, history=PROFILER_HISTORY, sections=SECTIONS):
+        self.enabled = enabled
+        self.sections = sections
+        self.history = {name: deque(maxlen=history) for name in sections}
+        self.frame_times = deque(maxlen=history)
+        self._totals = {}
+
+    def scope(self, name):
+        # Disabled profiling hands back a shared no-op context manager.
+        if not self.enabled:
+            return NULL_SCOPE
+        return _Scope(self._totals, name)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.reset()
+
+    def reset(self):
+        for samples in self.history.values():
+            samples.clear()
+        self.frame_times.clear()
+        self._totals = {}
+
+    def end_frame(self, frame_seconds):
+        if not self.enabled:
+            return
+        for name in self.sections:
+            self.history[name].append(self._totals.get(name, 0.0))
+        self.frame_times.append(frame_seconds)
+        self._totals = {}
+
+    def average_ms(self, name):
+        samples = self.history[name]
+        return 1000.0 * sum(samples) / len(samples) if samples else 0.0
+
+    @property
+    def fps(self):
+        total = sum(self.frame_times)
+        return len(self.frame_times) / total if total > 0 else 0.0
+
+
+NULL_PROFILER = Profiler()
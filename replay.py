@@ -0,0 +1,145 @@
+import argparse
+import struct
+import time
+
+from game_session import GameSession
+from settings import PHYSICS_HZ
+
+MAGIC = b"GPRP"
+VERSION = 3
+HEADER = struct.Struct("<4sHQH")
+RUN = struct.Struct("<BH")
+MAX_RUN = 0xFFFF
+
+# One byte per tick: bits 0-1 direction (0 idle, 1 right, 2 left), then jump,
+# crouch, attack, and a restart flag applied before the tick. Identical
+# consecutive ticks are run-length encoded as (byte, count) pairs.
+JUMP_BIT = 1 << 2
+CROUCH_BIT = 1 << 3
+ATTACK_BIT = 1 << 4
+RESTART_BIT = 1 << 5
+
+
+def encode_inputs(inputs, restart=False):
+    direction = inputs.get("direction", 0)
+    code = 1 if direction > 0 else 2 if direction < 0 else 0
+    if inputs.get("jump"):
+        code |= JUMP_BIT
+    if inputs.get("crouch"):
+        code |= CROUCH_BIT
+    if inputs.get("attack"):
+        code |= ATTACK_BIT
+    if restart:
+        code |= RESTART_BIT
+    return code
+
+
+def decode_inputs(code):
+    direction = (0, 1, -1)[code & 0b11]
+    inputs = {
+        "direction": direction,
+        "jump": bool(code & JUMP_BIT),
+        "crouch": bool(code & CROUCH_BIT),
+        "attack": bool(code & ATTACK_BIT),
+    }
+    return bool(code & RESTART_BIT), inputs
+
+
+class InputRecorder:
+    def __init__(self, path, seed, tick_hz=PHYSICS_HZ):
+        self.path = path
+        self.ticks = 0
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, seed, tick_hz))
+        self._code = None
+        self._count = 0
+        self._restart = False
+
+    def mark_restart(self):
+        self._restart = True
+
+    def record(self, inputs):
+        code = encode_inputs(inputs, self._restart)
+        self._restart = False
+        self.ticks += 1
+        if code == self._code and self._count < MAX_RUN:
+            self._count += 1
+            return
+        self._flush_run()
+        self._code = code
+        self._count = 1
+
+    def _flush_run(self):
+        if self._count:
+            self._file.write(RUN.pack(self._code, self._count))
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._flush_run()
+        self._count = 0
+        self._file.close()
+
+
+class Replay:
+    def __init__(self, seed, tick_hz, codes):
+        self.seed = seed
+        self.tick_hz = tick_hz
+        self.codes = codes
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as fh:
+            data = fh.read()
+        magic, version, seed, tick_hz = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay file")
+        if tick_hz != PHYSICS_HZ:
+            # Inputs are per tick, so a different tick rate would replay a different run.
+            raise ValueError(f"{path} was recorded at {tick_hz} Hz but physics runs at {PHYSICS_HZ} Hz")
+        codes = bytearray()
+        for code, count in RUN.iter_unpack(data[HEADER.size:]):
+            codes.extend(bytes((code,)) * count)
+        return cls(seed, tick_hz, bytes(codes))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        for code in self.codes:
+            yield decode_inputs(code)
+
+    def new_session(self):
+        session = GameSession(seed=self.seed)
+        session.start_run(session.level.get_lab_door_spawn())
+        return session
+
+
+def run_headless(replay, session=None):
+    session = replay.new_session() if session is None else session
+    for restart, inputs in replay:
+        if restart:
+            session.restart()
+        session.step(inputs)
+    return session
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded run without a display.")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    start = time.perf_counter()
+    session = run_headless(replay)
+    elapsed = time.perf_counter() - start
+    rate = len(replay) / elapsed if elapsed > 0 else float("inf")
+    print(f"seed {replay.seed}  ticks {len(replay)}  ({rate:.0f} ticks/s)")
+    print(
+        f"score {session.score}  distance {int(session.distance_m)} m  level {session.level.level_index}  "
+        f"lives {session.lives}  game over {session.game_over}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 # Screen
 WIDTH, HEIGHT = 960, 540
 FPS = 60
+PHYSICS_HZ = 60
+MAX_CATCHUP_TICKS = 5
 
 # Physics
 GRAVITY = 0.8
 JUMP_STRENGTH = -14.5
 PLAYER_SPEED = 5.8
 MAX_FALL_SPEED = 18
+# Sweep moves against platforms and hazards instead of only testing the end position.
+# The two modes play differently: jumping while running into a hazard on the ground
+# hits in swept mode (the x leg passes through it before the rise), but clears it in
+# discrete mode. Replays only reproduce under the mode they were recorded with.
+SWEPT_COLLISION = False
 
 # Player
 PLAYER_WIDTH = 30
@@ -15,6 +22,7 @@ PLAYER_CROUCH_HEIGHT = 26
 ATTACK_FRAMES = 8
 
 # Score and levels
+MAX_LIVES = 4
 LEVEL_SCORE_STEP = 180
 MAX_LEVEL = 7
 DISTANCE_PER_SCORE = 1.9
@@ -56,3 +64,41 @@ ATTACK_COLOR = (101, 234, 255)
 
 # Camera (if shown)
 CAMERA_SIZE = (180, 100)
+
+# Gesture capture
+CAMERA_RECONNECT_FRAMES = 20
+CAMERA_RETRY_SECONDS = 1.0
+INFERENCE_RATE_WINDOW = 30
+GESTURE_STALE_SECONDS = 0.5
+LATENCY_WINDOW = 600
+CAMERA_PREVIEW_HZ = 15
+GESTURE_INFERENCE_SIZE = (320, 240)
+GESTURE_ROI = True
+GESTURE_ROI_PADDING = 0.35
+GESTURE_REDETECT_FRAMES = 15
+
+# Collision broadphase
+BROADPHASE_CELL_SIZE = 128
+
+# Sound
+SOUND_SAMPLE_RATE = 44100
+SOUND_CACHE_DIR = None
+SOUND_PRELOAD = "background"
+SOUND_CHANNELS = 8
+
+# Debug overlay
+PROFILER_HISTORY = 120
+
+# Training environment
+ENV_MAX_STEPS = 3600
+ENV_OBS_RANGE = 480
+ENV_NEAR_PLATFORMS = 4
+ENV_NEAR_HAZARDS = 3
+ENV_NEAR_COLLECTIBLES = 4
+
+# Level streaming
+LEVEL_CHUNK_WIDTH = 480
+LEVEL_CHUNKS_AHEAD = 2
+LEVEL_GEN_BUDGET = 4
+LEVEL_RETIRE_MARGIN = 60
+LEVEL_CACHE_CHUNKS = 512
@@ -1,69 +1,209 @@
-import array
 import math
+import os
+import threading
+import time
+
+import numpy as np
 import pygame
 
+from settings import SOUND_CACHE_DIR, SOUND_CHANNELS, SOUND_PRELOAD, SOUND_SAMPLE_RATE
+
 
 def _build_tone(freq_hz, duration_ms, volume=0.35, sample_rate=44100):
     total = max(1, int(sample_rate * (duration_ms / 1000.0)))
     fade = max(1, int(total * 0.08))
-    data = array.array("h")
     amp = int(32767 * max(0.0, min(1.0, volume)))
-    for i in range(total):
-        t = i / float(sample_rate)
-        env = 1.0
-        if i < fade:
-            env = i / float(fade)
-        elif i > total - fade:
-            env = (total - i) / float(fade)
-        sample = int(amp * env * math.sin(2.0 * math.pi * freq_hz * t))
-        data.append(sample)
-    return data
+    i = np.arange(total, dtype=np.float64)
+    env = np.ones(total)
+    env[:fade] = i[:fade] / float(fade)
+    tail = i > total - fade
+    env[tail] = (total - i[tail]) / float(fade)
+    wave = np.sin(2.0 * math.pi * freq_hz * (i / float(sample_rate)))
+    # astype truncates toward zero, matching int() on each sample.
+    return (amp * env * wave).astype(np.int16)
+
+
+def _tone_path(cache_dir, freq_hz, duration_ms, volume, sample_rate):
+    return os.path.join(cache_dir, f"tone_{freq_hz}_{duration_ms}_{volume}_{sample_rate}.npy")
+
+
+def _load_tone(freq_hz, duration_ms, volume=0.35, sample_rate=44100, cache_dir=None):
+    if cache_dir is None:
+        return _build_tone(freq_hz, duration_ms, volume, sample_rate)
+
+    path = _tone_path(cache_dir, freq_hz, duration_ms, volume, sample_rate)
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        pass
+
+    samples = _build_tone(freq_hz, duration_ms, volume, sample_rate)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            np.save(fh, samples)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return samples
 
 
 def _concat(*chunks):
-    out = array.array("h")
-    for chunk in chunks:
-        out.extend(chunk)
-    return out
+    return np.concatenate(chunks)
+
+
+# Each effect is a sequence of (frequency Hz, duration ms, volume) tones.
+EFFECTS = {
+    "jump": ((620, 90, 0.30),),
+    "coin": ((980, 70, 0.33),),
+    "core": ((720, 70, 0.32), (1040, 90, 0.34)),
+    "attack": ((420, 65, 0.32),),
+    "hit": ((190, 90, 0.36), (150, 90, 0.30)),
+    "level_up": ((520, 70, 0.28), (700, 70, 0.30), (920, 85, 0.34)),
+    "game_over": ((440, 95, 0.32), (300, 95, 0.32), (190, 160, 0.34)),
+    "ui_click": ((800, 45, 0.25), (920, 40, 0.22)),
+}
+
+# Playback rules per effect: minimum gap between plays, how many copies may sound
+# at once, and priority when the channel pool is full (higher steals from lower).
+DEFAULT_RULE = {"cooldown_ms": 0, "max_voices": 2, "priority": 1}
+EFFECT_RULES = {
+    "jump": {"cooldown_ms": 80, "max_voices": 1, "priority": 2},
+    "coin": {"cooldown_ms": 40, "max_voices": 2, "priority": 1},
+    "core": {"cooldown_ms": 60, "max_voices": 2, "priority": 2},
+    "attack": {"cooldown_ms": 150, "max_voices": 1, "priority": 1},
+    "hit": {"cooldown_ms": 120, "max_voices": 1, "priority": 4},
+    "level_up": {"cooldown_ms": 300, "max_voices": 1, "priority": 3},
+    "game_over": {"cooldown_ms": 1000, "max_voices": 1, "priority": 5},
+    "ui_click": {"cooldown_ms": 60, "max_voices": 1, "priority": 2},
+}
 
 
 class SoundManager:
-    def __init__(self):
+    def __init__(self, cache_dir=SOUND_CACHE_DIR, preload=SOUND_PRELOAD, channels=SOUND_CHANNELS, rules=None):
+        # preload: "background" builds every effect on a worker thread, "lazy" builds
+        # each effect on its first play(), "eager" builds everything up front.
+        self.cache_dir = cache_dir
+        self.preload = preload
         self.enabled = True
         self.available = False
         self.sounds = {}
+        self.rules = {name: dict(rule) for name, rule in EFFECT_RULES.items()}
+        for name, rule in (rules or {}).items():
+            self.configure(name, **rule)
+        self.channels = []
+        self._voices = []
+        self._last_played = {}
+        self._ready = threading.Event()
+        self._build_thread = None
 
         try:
             if not pygame.mixer.get_init():
-                pygame.mixer.init(frequency=44100, size=-16, channels=1, buffer=512)
+                pygame.mixer.init(frequency=SOUND_SAMPLE_RATE, size=-16, channels=1, buffer=512)
+            pygame.mixer.set_num_channels(channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+            self._voices = [None] * channels
             self.available = True
-            self._build_sounds()
         except pygame.error:
             self.available = False
 
+        if not self.available:
+            self._ready.set()
+        elif preload == "background":
+            self._build_thread = threading.Thread(target=self._build_sounds, name="sound-build", daemon=True)
+            self._build_thread.start()
+        elif preload == "eager":
+            self._build_sounds()
+
     def _sound_from(self, samples):
-        return pygame.mixer.Sound(buffer=samples.tobytes())
+        return pygame.mixer.Sound(buffer=np.ascontiguousarray(samples))
+
+    def _tone(self, freq_hz, duration_ms, volume):
+        return _load_tone(freq_hz, duration_ms, volume, SOUND_SAMPLE_RATE, self.cache_dir)
+
+    def _build_sound(self, name):
+        tones = [self._tone(*tone) for tone in EFFECTS[name]]
+        self.sounds[name] = self._sound_from(_concat(*tones))
+        return self.sounds[name]
 
     def _build_sounds(self):
-        self.sounds["jump"] = self._sound_from(_build_tone(620, 90, 0.30))
-        self.sounds["coin"] = self._sound_from(_build_tone(980, 70, 0.33))
-        self.sounds["core"] = self._sound_from(_concat(_build_tone(720, 70, 0.32), _build_tone(1040, 90, 0.34)))
-        self.sounds["attack"] = self._sound_from(_build_tone(420, 65, 0.32))
-        self.sounds["hit"] = self._sound_from(_concat(_build_tone(190, 90, 0.36), _build_tone(150, 90, 0.30)))
-        self.sounds["level_up"] = self._sound_from(
-            _concat(_build_tone(520, 70, 0.28), _build_tone(700, 70, 0.30), _build_tone(920, 85, 0.34))
-        )
-        self.sounds["game_over"] = self._sound_from(
-            _concat(_build_tone(440, 95, 0.32), _build_tone(300, 95, 0.32), _build_tone(190, 160, 0.34))
-        )
-        self.sounds["ui_click"] = self._sound_from(_concat(_build_tone(800, 45, 0.25), _build_tone(920, 40, 0.22)))
+        try:
+            for name in EFFECTS:
+                if name not in self.sounds:
+                    self._build_sound(name)
+        except pygame.error:
+            self.available = False
+        finally:
+            self._ready.set()
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None):
+        if self.preload == "lazy" and not self._ready.is_set():
+            self._build_sounds()
+        return self._ready.wait(timeout)
+
+    def configure(self, name, cooldown_ms=None, max_voices=None, priority=None):
+        rule = self.rules.setdefault(name, dict(DEFAULT_RULE))
+        if cooldown_ms is not None:
+            rule["cooldown_ms"] = cooldown_ms
+        if max_voices is not None:
+            rule["max_voices"] = max_voices
+        if priority is not None:
+            rule["priority"] = priority
 
     def set_enabled(self, enabled):
         self.enabled = enabled
 
+    def _pick_channel(self, name, rule):
+        # Returns a channel index for `name`, or None if it should not sound.
+        free = None
+        voices = 0
+        victim = None
+        victim_age = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                self._voices[i] = None
+                if free is None:
+                    free = i
+                continue
+            effect, priority, started = self._voices[i] or (None, 0, 0.0)
+            if effect == name:
+                voices += 1
+            if priority < rule["priority"]:
+                # Channels started elsewhere have no voice and count as oldest, lowest priority.
+                if victim is None or (priority, started) < victim_age:
+                    victim = i
+                    victim_age = (priority, started)
+
+        if voices >= rule["max_voices"]:
+            return None
+        if free is not None:
+            return free
+        return victim
+
     def play(self, name):
         if not self.available or not self.enabled:
             return
         snd = self.sounds.get(name)
-        if snd is not None:
-            snd.play()
+        if snd is None:
+            if self.preload != "lazy" or name not in EFFECTS:
+                # Still being built in the background: skip rather than stall the frame.
+                return
+            snd = self._build_sound(name)
+
+        rule = self.rules.get(name, DEFAULT_RULE)
+        now = time.monotonic()
+        last = self._last_played.get(name)
+        if last is not None and (now - last) * 1000.0 < rule["cooldown_ms"]:
+            return
+
+        index = self._pick_channel(name, rule)
+        if index is None:
+            return
+        # Channel.play() cuts off whatever lower-priority voice was on a stolen channel.
+        self.channels[index].play(snd)
+        self._voices[index] = (name, rule["priority"], now)
+        self._last_played[name] = now
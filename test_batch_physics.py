@@ -0,0 +1,65 @@
+import os
+import random
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pytest
+
+from batch_physics import PlayerBatch, platform_array
+from level import Level
+from player import Player
+from settings import *
+
+COUNT = 300
+TICKS = 600
+
+
+def _snapshot(player):
+    return (tuple(player.rect), player.vel_x, player.vel_y, player.on_ground, player.crouching, player.attack_timer, player.facing)
+
+
+@pytest.mark.parametrize("mode", ["shared", "stacked"])
+def test_batch_matches_player_update(mode):
+    # Player objects and a PlayerBatch get the same random inputs on real level
+    # layouts, either one layout for everyone or a different one per player.
+    rng = random.Random(5)
+    levels = [Level(seed=n) for n in range(3)]
+    for n, level in enumerate(levels):
+        level.update_level_for_score(n * LEVEL_SCORE_STEP * 3)
+    layouts = [levels[i % 3 if mode == "stacked" else 0].platforms for i in range(COUNT)]
+    if mode == "stacked":
+        platforms = np.zeros((COUNT, max(len(level.platforms) for level in levels), 4), dtype=np.int64)
+        for i, layout in enumerate(layouts):
+            platforms[i, :len(layout)] = platform_array(layout)
+    else:
+        platforms = platform_array(levels[0].platforms)
+
+    players = []
+    for _ in range(COUNT):
+        player = Player()
+        player.rect.midbottom = (rng.randint(0, WIDTH), rng.randint(100, HEIGHT - 150))
+        player.vel_y = rng.uniform(-15, 18)
+        players.append(player)
+    batch = PlayerBatch.from_players(players)
+
+    probe = Player()
+    for tick in range(TICKS):
+        move_dir = [rng.choice((-1, 0, 1)) for _ in range(COUNT)]
+        crouch = [rng.random() < 0.2 for _ in range(COUNT)]
+        jump = [rng.random() < 0.1 for _ in range(COUNT)]
+        attack = [rng.random() < 0.05 for _ in range(COUNT)]
+        for i, player in enumerate(players):
+            if jump[i]:
+                player.jump()
+            if attack[i]:
+                player.attack()
+            player.set_crouch(crouch[i])
+            player.update(move_dir[i], layouts[i])
+        batch.jump(jump)
+        batch.attack(attack)
+        batch.set_crouch(crouch)
+        batch.update(move_dir, platforms)
+        for i, player in enumerate(players):
+            batch.store(i, probe)
+            assert _snapshot(probe) == _snapshot(player), f"tick {tick}, player {i}"
@@ -0,0 +1,39 @@
+import os
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import level
+from settings import *
+
+TICKS = 6000
+
+
+def _course(seed):
+    # Scrolls a fresh level at run speed, changing level halfway, and samples its
+    # layout every 250 ticks.
+    course = level.Level(seed)
+    samples = []
+    for tick in range(TICKS):
+        course.scroll_world(-6)
+        if tick == TICKS // 2:
+            course.update_level_for_score(LEVEL_SCORE_STEP * 3)
+        if tick % 250 == 0:
+            store = course.collectibles
+            samples.append((
+                tuple(map(tuple, course.platforms)),
+                tuple(map(tuple, course.hazards)),
+                tuple(sorted(tuple(store.rect(i)) for i in store.active())),
+            ))
+    return samples
+
+
+def test_warm_layout_cache_matches_cold():
+    level.clear_layouts()
+    cold = _course(7)
+    assert level._layouts
+    assert _course(7) == cold
+
+
+def test_different_seeds_give_different_courses():
+    level.clear_layouts()
+    assert _course(7) != _course(8)